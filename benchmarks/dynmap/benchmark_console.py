@@ -0,0 +1,107 @@
+# Microbenchmark for console line matching.
+#
+# Replays a recorded console log through the cog's console matching, with a number of registered waiters and progress
+# listeners like those of queued and running renders, and compares the time per line with offering every line to every
+# waiter and listener in turn.
+#
+# Requires the cog's dependencies (Red-DiscordBot), since importing the cog's modules loads the cog. Run from the repository root:
+#
+#   python benchmarks/dynmap/benchmark_console.py --waiters 20
+
+from timeit import default_timer as timer
+from typing import Callable, List, Tuple
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from dynmap.console import ConsoleMatcher, ConsoleWaiter, strip_ansi_control_sequences
+from dynmap.dynmap import Dynmap
+from dynmap.players import ENTITY_DATA_KEYWORD, PlayerLocationCache
+from dynmap.progress import RENDER_PROGRESS_KEYWORD, RenderProgress
+
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_console.log')
+
+# Waiters and listeners of renders queued on worlds that do not appear in the log, so that none of them is resolved and
+# every repetition does the same work
+def create_waiters(count: int) -> Tuple[List[ConsoleWaiter], List[Tuple[Callable[[str], None], str]]]:
+  waiters = []
+  listeners = [(PlayerLocationCache().observe, ENTITY_DATA_KEYWORD)]
+
+  for i in range(count):
+    world = f'benchmark_{i}'
+    waiters.append(ConsoleWaiter(
+      success_response = Dynmap.CONSOLE_MESSAGE_RENDER_STARTED.format(radius = 300, world = world),
+      failure_response = Dynmap.CONSOLE_MESSAGE_RENDER_ALREADY_RUNNING.format(world = world)))
+    waiters.append(ConsoleWaiter(success_response = Dynmap.CONSOLE_MESSAGE_RENDER_FINISHED.format(world = world)))
+    waiters.append(ConsoleWaiter(
+      success_response = Dynmap.CONSOLE_MESSAGE_ENTITY_DATA_RETURNED.format(player = f'Player{i}'),
+      failure_response = Dynmap.CONSOLE_MESSAGE_NO_ENTITY_FOUND))
+    listeners.append((RenderProgress(world).observe, RENDER_PROGRESS_KEYWORD))
+
+  return waiters, listeners
+
+# Offers every line to every listener and waiter, as the reader did before console matching was combined
+def run_naive(lines: List[str], waiters: List[ConsoleWaiter], listeners: List[Tuple[Callable[[str], None], str]]) -> int:
+  matched = 0
+  for raw_line in lines:
+    line = strip_ansi_control_sequences(raw_line)
+    folded_line = line.casefold()
+
+    for listener, _ in listeners:
+      listener(line)
+
+    for waiter in waiters:
+      matched += waiter.match(line, folded_line)
+
+  return matched
+
+def run_matcher(lines: List[str], waiters: List[ConsoleWaiter], listeners: List[Tuple[Callable[[str], None], str]]) -> int:
+  matcher = ConsoleMatcher()
+  for waiter in waiters:
+    matcher.add_waiter(waiter)
+  for listener, keyword in listeners:
+    matcher.add_listener(listener, keyword)
+
+  matched = 0
+  for raw_line in lines:
+    line = strip_ansi_control_sequences(raw_line)
+    matched += len(matcher.match(line, line.casefold()))
+
+  return matched
+
+def measure(name: str, run: Callable[..., int], lines: List[str], waiters: List[ConsoleWaiter], listeners: List[Tuple[Callable[[str], None], str]]) -> float:
+  start_time = timer()
+  matched = run(lines, waiters, listeners)
+  elapsed_time_in_seconds = timer() - start_time
+
+  print(f'{name:<8} {elapsed_time_in_seconds:8.3f} s  {elapsed_time_in_seconds / len(lines) * 1e6:8.2f} µs/line  {len(lines) / elapsed_time_in_seconds:12,.0f} lines/s  {matched} matched')
+  return elapsed_time_in_seconds
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+  with open(args.log, encoding = 'utf-8') as log_file:
+    lines = log_file.read().splitlines() * args.repeat
+
+  # Waiters create their futures on the running loop
+  waiters, listeners = create_waiters(args.waiters)
+
+  print(f'{len(lines)} lines, {len(waiters)} waiters, {len(listeners)} listeners')
+  naive_time_in_seconds = measure('naive', run_naive, lines, waiters, listeners)
+  matcher_time_in_seconds = measure('matcher', run_matcher, lines, waiters, listeners)
+  print(f'Speedup: {naive_time_in_seconds / matcher_time_in_seconds:.1f}x')
+
+  for waiter in waiters:
+    waiter.close()
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description = 'Benchmark console line matching of the Dynmap cog')
+  parser.add_argument('--log', default = DEFAULT_LOG_PATH, help = 'Recorded console log to replay, one line per console event')
+  parser.add_argument('--repeat', type = int, default = 100, help = 'Number of times to replay the log')
+  parser.add_argument('--waiters', type = int, default = 10, help = 'Number of renders whose waiters and listeners are registered')
+  asyncio.run(run_benchmark(parser.parse_args()))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,208 @@
+# Load benchmark for the Dynmap cog's render path.
+#
+# Starts the fake Pterodactyl panel from fake_pterodactyl.py, loads the cog with an in-memory config and fake Discord
+# objects, then sends N render requests at the same time through run_dynmap_render, and reports throughput, request
+# latency, queue wait, the cog's phase timings, and the number of Pterodactyl and Discord API calls.
+#
+# Requires the cog's dependencies (Red-DiscordBot, which includes discord.py and aiohttp). Run from the repository root:
+#
+#   python benchmarks/dynmap/benchmark_renders.py --requests 10 --spam 200
+
+from aiohttp import web
+from asyncio import gather
+from collections import Counter
+from itertools import count
+from timeit import default_timer as timer
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_pterodactyl import FakePterodactyl, add_server_arguments, get_server_options
+from redbot.core import Config
+
+from dynmap.dynmap import Dynmap
+from dynmap.helpers import DynmapParameters
+
+# Counts of Discord API calls made by the cog
+discord_calls: Counter[str] = Counter()
+message_ids = count(1000)
+
+class FakeValue:
+  def __init__(self, values: Dict[str, Any], key: str):
+    self.values = values
+    self.key = key
+
+  def __call__(self) -> 'FakeValue':
+    return self
+
+  def __await__(self):
+    async def get():
+      return self.values[self.key]
+    return get().__await__()
+
+  async def __aenter__(self) -> Any:
+    return self.values[self.key]
+
+  async def __aexit__(self, *args) -> None:
+    pass
+
+  async def set(self, value: Any) -> None:
+    self.values[self.key] = value
+
+  async def clear(self) -> None:
+    pass
+
+# In-memory stand-in for Red's Config, with only the parts the cog uses
+class FakeConfig:
+  def __init__(self):
+    self.values: Dict[str, Any] = {}
+
+  def register_global(self, **defaults) -> None:
+    self.values.update(defaults)
+
+  async def all(self) -> Dict[str, Any]:
+    return dict(self.values)
+
+  def __getattr__(self, key: str) -> FakeValue:
+    return FakeValue(self.values, key)
+
+class FakeUser:
+  def __init__(self, user_id: int):
+    self.id = user_id
+    self.display_name = f'user{user_id}'
+    self.avatar = None
+    self.mention = f'<@{user_id}>'
+
+class FakeChannel:
+  def __init__(self, channel_id: int):
+    self.id = channel_id
+
+class FakeMessage:
+  def __init__(self, embed: Any):
+    self.id = next(message_ids)
+    self.channel = FakeChannel(2)
+    self.embed = embed
+    self.jump_url = f'https://discord.com/channels/1/2/{self.id}'
+
+  async def edit(self, embed: Any = None) -> None:
+    discord_calls['message_edit'] += 1
+    self.embed = embed
+
+  async def clear_reactions(self) -> None:
+    discord_calls['clear_reactions'] += 1
+
+  async def add_reaction(self, reaction: str) -> None:
+    discord_calls['add_reaction'] += 1
+
+class FakeContext:
+  def __init__(self, author: FakeUser):
+    self.author = author
+    self.messages: List[FakeMessage] = []
+
+  async def send(self, content: str = None, embed: Any = None) -> FakeMessage:
+    discord_calls['send'] += 1
+    message = FakeMessage(embed)
+    self.messages.append(message)
+    return message
+
+class FakeBot:
+  def __init__(self):
+    self.user = FakeUser(1)
+
+  def get_user(self, user_id: int) -> FakeUser:
+    return FakeUser(user_id)
+
+def format_seconds(samples: List[float], quantile: float) -> str:
+  if not samples:
+    return '-'
+  samples = sorted(samples)
+  return f'{samples[min(int(quantile * len(samples)), len(samples) - 1)]:.2f}s'
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+  fake_server = FakePterodactyl(get_server_options(args))
+  runner = web.AppRunner(fake_server.create_app())
+  await runner.setup()
+  site = web.TCPSite(runner, '127.0.0.1', 0)
+  await site.start()
+  port = runner.addresses[0][1]
+
+  with patch.object(Config, 'get_conf', return_value = FakeConfig()):
+    cog = Dynmap(FakeBot())
+
+  config = cog.config
+  await config.pterodactyl_api_host.set(f'http://127.0.0.1:{port}/')
+  await config.pterodactyl_api_key.set('benchmark')
+  await config.pterodactyl_server_id.set('benchmark')
+  await config.web_host.set('http://127.0.0.1')
+  await config.render_queue_size.set(args.requests)
+  await config.render_user_queue_limit.set(0)
+  await config.render_freshness_window_in_seconds.set(0)
+  await config.elapsed_time_interval_in_seconds.set(1)
+  await config.render_timeout_in_seconds.set(args.render_timeout)
+  cog.settings_cache.invalidate()
+
+  await cog.cog_load()
+
+  # Spread the requests over the map, unless overlapping requests are wanted
+  random.seed(args.seed)
+  spread = 0 if args.overlap else 20000
+  contexts = [FakeContext(FakeUser(100 + i)) for i in range(args.requests)]
+  requests = [
+    DynmapParameters(x = random.randint(-spread, spread), z = random.randint(-spread, spread), radius = args.radius)
+    for _ in contexts
+  ]
+
+  async def run_request(ctx: FakeContext, params: DynmapParameters) -> float:
+    start_time = timer()
+    await cog.run_dynmap_render(ctx, params)
+    return timer() - start_time
+
+  start_time = timer()
+  latencies = await gather(*(run_request(ctx, params) for ctx, params in zip(contexts, requests)))
+  elapsed_time = timer() - start_time
+
+  await cog.cog_unload()
+  await runner.cleanup()
+
+  results = Counter(ctx.messages[0].embed.title for ctx in contexts)
+
+  print(f'Requests:             {args.requests}')
+  print(f'Wall time:            {elapsed_time:.2f}s')
+  print(f'Throughput:           {args.requests / elapsed_time:.3f} requests/s')
+  print(f'Request latency:      p50 {format_seconds(latencies, 0.5)}, p95 {format_seconds(latencies, 0.95)}, max {format_seconds(latencies, 1)}')
+  print()
+  print('Results:')
+  for title, result_count in results.most_common():
+    print(f'  {title:<40} {result_count}')
+  print()
+  print('Phase timings:')
+  print(cog.stats.format_table())
+  print('Pterodactyl calls:')
+  for name, call_count in sorted(fake_server.counters.items()):
+    print(f'  {name:<40} {call_count}')
+  print()
+  print('Discord calls:')
+  for name, call_count in sorted(discord_calls.items()):
+    print(f'  {name:<40} {call_count}')
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description = 'Benchmarks concurrent Dynmap render requests against a fake Pterodactyl panel.')
+  parser.add_argument('--requests', type = int, default = 5, help = 'Number of concurrent render requests')
+  parser.add_argument('--radius', type = int, default = 100, help = 'Radius of each render')
+  parser.add_argument('--overlap', action = 'store_true', help = 'Request the same area every time, instead of areas spread over the map')
+  parser.add_argument('--seed', type = int, default = 1, help = 'Random seed for the render coordinates')
+  parser.add_argument('--render-timeout', type = int, default = 600, help = 'Render timeout in seconds')
+  add_server_arguments(parser)
+
+  asyncio.run(run_benchmark(parser.parse_args()))
+
+if __name__ == '__main__':
+  main()
\ No newline at end of file
@@ -0,0 +1,310 @@
+# Local stand-in for a Pterodactyl panel running a Minecraft server with Dynmap.
+#
+# Serves the websocket credentials endpoint of the client API, and a websocket that speaks the subset of the
+# Pterodactyl websocket protocol used by the Dynmap cog: 'auth', 'send command', 'console output' and 'token expiring'.
+# Commands sent by the cog are answered with the console lines Minecraft and Dynmap would write, with scripted render
+# timings, and the console can be flooded with unrelated lines to measure the cost of console processing. Websockets can
+# be dropped at an interval to exercise reconnecting during renders.
+#
+# Run it on its own to point a development bot at it:
+#
+#   python benchmarks/dynmap/fake_pterodactyl.py --port 8080
+#
+# then set `pterodactyl_host` to `http://127.0.0.1:8080/`, and `pterodactyl_key` and `pterodactyl_id` to anything.
+
+from aiohttp import WSMsgType, web
+from asyncio import CancelledError, Task, create_task, sleep
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from time import time
+from typing import Dict, Set, Tuple
+
+import argparse
+import asyncio
+import json
+import random
+import re
+
+RADIUS_RENDER_COMMAND_REGEX = re.compile(r'^dynmap radiusrender (?P<world>\S+) (?P<x>-?\d+) (?P<z>-?\d+) (?P<radius>\d+)$')
+CANCEL_RENDER_COMMAND_REGEX = re.compile(r'^dynmap cancelrender (?P<world>\S+)$')
+ENTITY_DATA_COMMAND_REGEX = re.compile(r'^data get entity (?P<player>\S+) (?P<path>Dimension|Pos)$')
+STATS_COMMAND_REGEX = re.compile(r'^dynmap stats$')
+
+SPAM_LINES = [
+  '[Server thread/INFO]: Villager EntityVillager[\'Villager\'/1234, l=\'ServerLevel[new]\', x=10.50, y=64.00, z=-3.50] died, message: \'Villager was squished too much\'',
+  '[Server thread/WARN]: Can\'t keep up! Is the server overloaded? Running 2034ms or 40 ticks behind',
+  '[Server thread/INFO]: <Steve> has anyone seen my diamond pickaxe',
+  '[Server thread/INFO]: Alex joined the game',
+  '[Server thread/INFO]: Alex lost connection: Disconnected',
+  '[Dynmap Render Thread/INFO]: [dynmap] Loaded 12 pending tile renders for world \'new\'',
+  '[Craft Scheduler Thread - 3/INFO]: [CoreProtect] Database lookup completed in 12ms'
+]
+
+@dataclass
+class FakeServerOptions:
+  render_base_seconds: float = 2.0
+  render_seconds_per_block: float = 0.000005
+  render_tiles_per_block: float = 0.002
+  progress_interval_in_seconds: float = 1.0
+  spam_lines_per_second: float = 0.0
+  token_lifetime_in_seconds: float = 600.0
+  disconnect_interval_in_seconds: float = 0.0
+  players: Dict[str, Tuple[str, float, float]] = field(default_factory = lambda: {
+    'Steve': ('overworld', 120.5, -340.5),
+    'Alex': ('the_nether', -20.5, 15.5)
+  })
+
+class FakePterodactyl:
+  def __init__(self, options: FakeServerOptions):
+    self.options = options
+
+    # Counts of requests, websocket connections, commands and console lines, for the benchmark report
+    self.counters: Counter[str] = Counter()
+
+    self.sockets: Dict[str, Set[web.WebSocketResponse]] = defaultdict(set)
+    self.renders: Dict[Tuple[str, str], Task] = {}
+    self.spam_task: Task = None
+    self.disconnect_task: Task = None
+
+  def create_app(self) -> web.Application:
+    app = web.Application()
+    app.router.add_get('/api/client/servers/{server_id}/websocket', self.get_websocket_credentials)
+    app.router.add_get('/ws/{server_id}', self.handle_websocket)
+    app.on_startup.append(self.start_spam)
+    app.on_startup.append(self.start_disconnects)
+    app.on_cleanup.append(self.stop)
+    return app
+
+  async def get_websocket_credentials(self, request: web.Request) -> web.Response:
+    self.counters['rest_websocket_credentials'] += 1
+
+    if not request.headers.get('Authorization', '').startswith('Bearer '):
+      return web.json_response({ 'errors': [{ 'code': 'InvalidCredentialsException' }] }, status = 401)
+
+    server_id = request.match_info['server_id']
+    socket = str(request.url.with_path(f'/ws/{server_id}').with_query(None).with_scheme('ws'))
+
+    return web.json_response({
+      'data': {
+        'socket': socket,
+        'token': self.create_token(time() + self.options.token_lifetime_in_seconds)
+      }
+    })
+
+  async def handle_websocket(self, request: web.Request) -> web.WebSocketResponse:
+    server_id = request.match_info['server_id']
+
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    self.counters['websocket_connections'] += 1
+
+    authenticated = False
+    expiry_task: Task = None
+
+    try:
+      async for ws_message in ws:
+        if ws_message.type != WSMsgType.TEXT:
+          continue
+
+        event_json = json.loads(ws_message.data)
+        event = event_json.get('event')
+        args = event_json.get('args') or []
+
+        if event == 'auth':
+          self.counters['websocket_auth'] += 1
+          expires_at = self.decode_token_expiry(args[0] if args else '')
+
+          if expires_at is None or expires_at <= time():
+            await ws.send_json({ 'event': 'jwt error', 'args': ['jwt: exp claim is invalid'] })
+            continue
+
+          authenticated = True
+          self.sockets[server_id].add(ws)
+          await ws.send_json({ 'event': 'auth success' })
+
+          if expiry_task is not None:
+            expiry_task.cancel()
+          expiry_task = create_task(self.send_token_expiring(ws, expires_at))
+
+        elif event == 'send command' and authenticated:
+          self.counters['commands'] += 1
+          await self.run_command(server_id, args[0] if args else '')
+
+    finally:
+      self.sockets[server_id].discard(ws)
+      if expiry_task is not None:
+        expiry_task.cancel()
+
+    return ws
+
+  async def send_token_expiring(self, ws: web.WebSocketResponse, expires_at: float) -> None:
+    await sleep(max(expires_at - 60 - time(), 0))
+    if not ws.closed:
+      await ws.send_json({ 'event': 'token expiring' })
+
+    await sleep(max(expires_at - time(), 0))
+    if not ws.closed:
+      await ws.send_json({ 'event': 'token expired' })
+
+  async def run_command(self, server_id: str, command: str) -> None:
+    render_match = RADIUS_RENDER_COMMAND_REGEX.match(command)
+    cancel_match = CANCEL_RENDER_COMMAND_REGEX.match(command)
+    entity_match = ENTITY_DATA_COMMAND_REGEX.match(command)
+    stats_match = STATS_COMMAND_REGEX.match(command)
+
+    if render_match:
+      world = render_match.group('world')
+      radius = int(render_match.group('radius'))
+
+      render = self.renders.get((server_id, world))
+      if render is not None and not render.done():
+        await self.broadcast(server_id, f'[Server thread/INFO]: Radius render of world \'{world}\' already active.')
+        return
+
+      await self.broadcast(server_id, f'[Server thread/INFO]: Render of {radius} block radius starting on world \'{world}\'...')
+      self.renders[(server_id, world)] = create_task(self.run_render(server_id, world, radius))
+
+    elif cancel_match:
+      world = cancel_match.group('world')
+
+      render = self.renders.pop((server_id, world), None)
+      if render is not None:
+        render.cancel()
+      await self.broadcast(server_id, f'[Server thread/INFO]: Cancelled render for \'{world}\'')
+
+    elif entity_match:
+      player_name = entity_match.group('player')
+      location = next((location for name, location in self.options.players.items() if name.casefold() == player_name.casefold()), None)
+
+      if location is None:
+        await self.broadcast(server_id, '[Server thread/INFO]: No entity was found')
+      elif entity_match.group('path') == 'Dimension':
+        await self.broadcast(server_id, f'[Server thread/INFO]: {player_name} has the following entity data: "minecraft:{location[0]}"')
+      else:
+        await self.broadcast(server_id, f'[Server thread/INFO]: {player_name} has the following entity data: [{location[1]:.1f}d, 64.0d, {location[2]:.1f}d]')
+
+    elif stats_match:
+      active_worlds = ' '.join(world for (render_server_id, world), render in self.renders.items() if render_server_id == server_id and not render.done())
+      await self.broadcast(server_id, '[Server thread/INFO]: Tile Render Statistics:')
+      await self.broadcast(server_id, f'[Server thread/INFO]:   Active render jobs: {active_worlds}')
+
+    else:
+      await self.broadcast(server_id, '[Server thread/INFO]: Unknown or incomplete command, see below for error')
+
+  # Writes progress lines like Dynmap does while the render runs, then the completion and finish lines
+  async def run_render(self, server_id: str, world: str, radius: int) -> None:
+    block_count = (2 * radius + 1) ** 2
+    duration_in_seconds = self.options.render_base_seconds + self.options.render_seconds_per_block * block_count
+    tiles = max(int(self.options.render_tiles_per_block * block_count), 1)
+    msec_per_tile = duration_in_seconds * 1000 / tiles
+
+    self.counters['renders_started'] += 1
+    elapsed_time_in_seconds = 0.0
+
+    try:
+      while elapsed_time_in_seconds + self.options.progress_interval_in_seconds < duration_in_seconds:
+        await sleep(self.options.progress_interval_in_seconds)
+        elapsed_time_in_seconds += self.options.progress_interval_in_seconds
+
+        tiles_rendered = int(tiles * elapsed_time_in_seconds / duration_in_seconds)
+        await self.broadcast(server_id, f'[Dynmap Render Thread/INFO]: [dynmap] Radius render of map \'flat\' of \'{world}\' in progress - {tiles_rendered} tiles rendered ({msec_per_tile:.2f} msec/map-tile, {msec_per_tile / 4:.2f} msec per render)')
+
+      await sleep(duration_in_seconds - elapsed_time_in_seconds)
+
+      await self.broadcast(server_id, f'[Dynmap Render Thread/INFO]: [dynmap] Radius render of map \'flat\' of \'{world}\' completed - {tiles} tiles rendered ({msec_per_tile:.2f} msec/map-tile, {msec_per_tile / 4:.2f} msec per render)')
+      await self.broadcast(server_id, f'[Dynmap Render Thread/INFO]: [dynmap] Radius render of \'{world}\' finished.')
+      self.counters['renders_finished'] += 1
+
+    except CancelledError:
+      self.counters['renders_cancelled'] += 1
+      raise
+
+    finally:
+      if self.renders.get((server_id, world)) is asyncio.current_task():
+        del self.renders[(server_id, world)]
+
+  async def broadcast(self, server_id: str, line: str) -> None:
+    self.counters['console_lines'] += 1
+
+    # Pterodactyl wraps console lines in ANSI control sequences
+    event_json = { 'event': 'console output', 'args': [f'\x1b[33m\x1b[K{line}\x1b[m'] }
+    for ws in list(self.sockets[server_id]):
+      if not ws.closed:
+        await ws.send_json(event_json)
+
+  async def start_spam(self, app: web.Application) -> None:
+    if self.options.spam_lines_per_second > 0:
+      self.spam_task = create_task(self.spam())
+
+  async def spam(self) -> None:
+    interval_in_seconds = 1 / self.options.spam_lines_per_second
+    while True:
+      await sleep(interval_in_seconds)
+      for server_id in list(self.sockets):
+        await self.broadcast(server_id, random.choice(SPAM_LINES))
+
+  async def start_disconnects(self, app: web.Application) -> None:
+    if self.options.disconnect_interval_in_seconds > 0:
+      self.disconnect_task = create_task(self.disconnect())
+
+  # Closes every websocket at the interval, while renders keep running, like a network outage would
+  async def disconnect(self) -> None:
+    while True:
+      await sleep(self.options.disconnect_interval_in_seconds)
+      for sockets in list(self.sockets.values()):
+        for ws in list(sockets):
+          self.counters['websocket_disconnects'] += 1
+          await ws.close()
+
+  async def stop(self, app: web.Application) -> None:
+    if self.spam_task is not None:
+      self.spam_task.cancel()
+    if self.disconnect_task is not None:
+      self.disconnect_task.cancel()
+    for render in self.renders.values():
+      render.cancel()
+
+  # An unsigned JWT. The cog only reads its 'exp' and 'iat' claims, and the fake server only checks that 'exp' has not passed.
+  @staticmethod
+  def create_token(expires_at: float) -> str:
+    def encode(value: dict) -> str:
+      return urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+    return f'{encode({ "alg": "none", "typ": "JWT" })}.{encode({ "iat": int(time()), "exp": int(expires_at) })}.fake'
+
+  @staticmethod
+  def decode_token_expiry(token: str) -> float | None:
+    try:
+      payload = token.split('.')[1]
+      return float(json.loads(urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+      return None
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+  parser.add_argument('--render-base-seconds', type = float, default = FakeServerOptions.render_base_seconds, help = 'Fixed duration of every render')
+  parser.add_argument('--render-seconds-per-block', type = float, default = FakeServerOptions.render_seconds_per_block, help = 'Additional render duration per block of the render area')
+  parser.add_argument('--progress-interval', type = float, default = FakeServerOptions.progress_interval_in_seconds, help = 'Seconds between render progress lines')
+  parser.add_argument('--spam', type = float, default = FakeServerOptions.spam_lines_per_second, help = 'Unrelated console lines per second')
+  parser.add_argument('--token-lifetime', type = float, default = FakeServerOptions.token_lifetime_in_seconds, help = 'Lifetime of websocket tokens in seconds')
+  parser.add_argument('--disconnect-interval', type = float, default = FakeServerOptions.disconnect_interval_in_seconds, help = 'Seconds between closing every websocket, or 0 to keep them open')
+
+def get_server_options(args: argparse.Namespace) -> FakeServerOptions:
+  return FakeServerOptions(
+    render_base_seconds = args.render_base_seconds,
+    render_seconds_per_block = args.render_seconds_per_block,
+    progress_interval_in_seconds = args.progress_interval,
+    spam_lines_per_second = args.spam,
+    token_lifetime_in_seconds = args.token_lifetime,
+    disconnect_interval_in_seconds = args.disconnect_interval)
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description = 'Runs a fake Pterodactyl panel for the Dynmap cog.')
+  parser.add_argument('--host', default = '127.0.0.1')
+  parser.add_argument('--port', type = int, default = 8080)
+  add_server_arguments(parser)
+  args = parser.parse_args()
+
+  web.run_app(FakePterodactyl(get_server_options(args)).create_app(), host = args.host, port = args.port)
+
+if __name__ == '__main__':
+  main()
\ No newline at end of file
@@ -1,11 +1,19 @@
 from redbot.core import Config, app_commands, commands, checks
 from redbot.core.bot import Red
 from redbot.core.utils.chat_formatting import pagify
+from typing import Literal
+
+from .render_queue import RenderQueue
+from .settings import DynmapSettingsCache
+from .stats import DynmapStats
 
 class DynmapConfig:
   def __init__(self):
     self.bot: Red
     self.config: Config
+    self.render_queue: RenderQueue
+    self.settings_cache: DynmapSettingsCache
+    self.stats: DynmapStats
 
   @commands.hybrid_group(name='dynmap_config')
   @checks.admin_or_permissions()
@@ -42,6 +50,7 @@ class DynmapConfig:
   async def dynmap_config_pterodactyl_host(self, ctx: commands.Context, host: str) -> None:
     """Sets the Pterodactyl API host URL."""
     await self.config.pterodactyl_api_host.set(host)
+    self.settings_cache.invalidate()
     await ctx.send(f'Pterodactyl API host URL has been set to `{host}`.')
 
   @dynmap_config.command(name='pterodactyl_key')
@@ -51,6 +60,7 @@ class DynmapConfig:
   async def dynmap_config_pterodactyl_key(self, ctx: commands.Context, key: str) -> None:
     """Sets the Pterodactyl API client key."""
     await self.config.pterodactyl_api_key.set(key)
+    self.settings_cache.invalidate()
     await ctx.send('Pterodactyl API client key has been set.')
 
   @dynmap_config.command(name='pterodactyl_id')
@@ -60,6 +70,7 @@ class DynmapConfig:
   async def dynmap_config_pterodactyl_id(self, ctx: commands.Context, id: str) -> None:
     """Sets the Pterodactyl API server ID."""
     await self.config.pterodactyl_server_id.set(id)
+    self.settings_cache.invalidate()
     await ctx.send(f'Pterodactyl API server ID has been set.')
 
   @dynmap_config.command(name='render_world')
@@ -69,6 +80,7 @@ class DynmapConfig:
   async def dynmap_config_render_world(self, ctx: commands.Context, world: str) -> None:
     """Sets the Minecraft world to render."""
     await self.config.render_world.set(world)
+    self.settings_cache.invalidate()
     await ctx.send(f'Render world set to `{world}`.')
 
   @dynmap_config.command(name='render_dimension')
@@ -78,6 +90,7 @@ class DynmapConfig:
   async def dynmap_config_render_dimension(self, ctx: commands.Context, dimension: str) -> None:
     """Sets the Minecraft dimension to render."""
     await self.config.render_dimension.set(dimension)
+    self.settings_cache.invalidate()
     await ctx.send(f'Render dimension set to `{dimension}`.')
 
   @dynmap_config.command(name='render_default_radius')
@@ -87,6 +100,7 @@ class DynmapConfig:
   async def dynmap_config_render_default_radius(self, ctx: commands.Context, radius: int) -> None:
     """Sets the default render radius (when radius is not specified in the render command)."""
     await self.config.render_default_radius.set(radius)
+    self.settings_cache.invalidate()
     await ctx.send(f'Default render radius set to `{radius}`.')
 
   @dynmap_config.command(name='render_queue_size')
@@ -96,6 +110,7 @@ class DynmapConfig:
   async def dynmap_config_render_queue_size(self, ctx: commands.Context, size: int) -> None:
     """Sets the maximum number of renders that can be queued, including the currently running render."""
     await self.config.render_queue_size.set(size)
+    self.settings_cache.invalidate()
     await ctx.send(f'Render queue size set to `{size}`.')
 
   @dynmap_config.command(name='web_host')
@@ -105,6 +120,7 @@ class DynmapConfig:
   async def dynmap_config_web_host(self, ctx: commands.Context, host: str) -> None:
     """Sets the Dynmap host URL used in the embed link."""
     await self.config.web_host.set(host)
+    self.settings_cache.invalidate()
     await ctx.send(f'Dynmap host URL set to `{host}`.')
 
   @dynmap_config.command(name='web_map')
@@ -114,6 +130,7 @@ class DynmapConfig:
   async def dynmap_config_web_map(self, ctx: commands.Context, map: str) -> None:
     """Sets the Dynmap map name used in the embed link."""
     await self.config.web_map.set(map)
+    self.settings_cache.invalidate()
     await ctx.send(f'Dynmap map name set to `{map}`.')
 
   @dynmap_config.command(name='web_zoom')
@@ -123,6 +140,7 @@ class DynmapConfig:
   async def dynmap_config_web_zoom(self, ctx: commands.Context, zoom: int) -> None:
     """Sets the Dynmap zoom level used in the embed link."""
     await self.config.web_zoom.set(zoom)
+    self.settings_cache.invalidate()
     await ctx.send(f'Dynmap zoom level set to `{zoom}`.')
 
   @dynmap_config.command(name='web_y')
@@ -132,17 +150,9 @@ class DynmapConfig:
   async def dynmap_config_web_y(self, ctx: commands.Context, y: int) -> None:
     """Sets the Dynmap Y coordinate used in the embed link."""
     await self.config.web_y.set(y)
+    self.settings_cache.invalidate()
     await ctx.send(f'Dynmap Y coordinate set to `{y}`.')
 
-  @dynmap_config.command(name='queued_render_start_delay')
-  @checks.admin_or_permissions()
-  @app_commands.default_permissions(administrator=True)
-  @app_commands.checks.has_permissions(administrator=True)
-  async def dynmap_config_delay_queued_render_start(self, ctx: commands.Context, delay: int) -> None:
-    """Sets the number of seconds for a queued render to wait after the current render has finished."""
-    await self.config.queue_render_delay_in_seconds.set(delay)
-    await ctx.send(f'Queued render delay set to `{delay}` seconds.')
-
   @dynmap_config.command(name='elapsed_interval')
   @checks.admin_or_permissions()
   @app_commands.default_permissions(administrator=True)
@@ -150,17 +160,9 @@ class DynmapConfig:
   async def dynmap_config_interval_elapsed(self, ctx: commands.Context, interval: int) -> None:
     """While a render is in progress, update the elapsed time every X seconds."""
     await self.config.elapsed_time_interval_in_seconds.set(interval)
+    self.settings_cache.invalidate()
     await ctx.send(f'Elapsed time interval set to `{interval}` seconds.')
 
-  @dynmap_config.command(name='cancel_interval')
-  @checks.admin_or_permissions()
-  @app_commands.default_permissions(administrator=True)
-  @app_commands.checks.has_permissions(administrator=True)
-  async def dynmap_config_interval_cancel(self, ctx: commands.Context, interval: int) -> None:
-    """While a render is in progress, check if a cancellation has been requested every X seconds."""
-    await self.config.cancellation_check_interval_in_seconds.set(interval)
-    await ctx.send(f'Cancellation check time interval set to `{interval}` seconds.')
-
   @dynmap_config.command(name='auth_timeout')
   @checks.admin_or_permissions()
   @app_commands.default_permissions(administrator=True)
@@ -168,6 +170,7 @@ class DynmapConfig:
   async def dynmap_config_timeout_auth(self, ctx: commands.Context, timeout: int) -> None:
     """Sets number of seconds to wait for a successful response after sending a websocket auth request."""
     await self.config.auth_timeout_in_seconds.set(timeout)
+    self.settings_cache.invalidate()
     await ctx.send(f'Auth timeout set to `{timeout}` seconds.')
 
   @dynmap_config.command(name='command_timeout')
@@ -177,6 +180,7 @@ class DynmapConfig:
   async def dynmap_config_timeout_command(self, ctx: commands.Context, timeout: int) -> None:
     """Sets number of seconds to wait for a console response after starting or cancelling a Dynmap render."""
     await self.config.command_timeout_in_seconds.set(timeout)
+    self.settings_cache.invalidate()
     await ctx.send(f'Command timeout set to `{timeout}` seconds.')
 
   @dynmap_config.command(name='render_timeout')
@@ -186,13 +190,147 @@ class DynmapConfig:
   async def dynmap_config_timeout_render(self, ctx: commands.Context, timeout: int) -> None:
     """Sets number of seconds to wait for a console message indicating that a Dynmap render has finished."""
     await self.config.render_timeout_in_seconds.set(timeout)
+    self.settings_cache.invalidate()
     await ctx.send(f'Render timeout set to `{timeout}` seconds.')
 
+  @dynmap_config.command(name='player_cache_ttl')
+  @checks.admin_or_permissions()
+  @app_commands.default_permissions(administrator=True)
+  @app_commands.checks.has_permissions(administrator=True)
+  async def dynmap_config_player_cache_ttl(self, ctx: commands.Context, ttl: int) -> None:
+    """Sets number of seconds that a player's location seen on the console is reused for player renders."""
+    await self.config.player_cache_ttl_in_seconds.set(ttl)
+    self.settings_cache.invalidate()
+    await ctx.send(f'Player cache TTL set to `{ttl}` seconds.')
+
+  @dynmap_config.command(name='freshness_window')
+  @checks.admin_or_permissions()
+  @app_commands.default_permissions(administrator=True)
+  @app_commands.checks.has_permissions(administrator=True)
+  async def dynmap_config_freshness_window(self, ctx: commands.Context, window: int) -> None:
+    """Sets number of seconds after a render during which requests for the same area are answered without rendering it again (0 to disable)."""
+    await self.config.render_freshness_window_in_seconds.set(window)
+    self.settings_cache.invalidate()
+    await ctx.send(f'Render freshness window set to `{window}` seconds.')
+
+  @dynmap_config.command(name='user_queue_limit')
+  @checks.admin_or_permissions()
+  @app_commands.default_permissions(administrator=True)
+  @app_commands.checks.has_permissions(administrator=True)
+  async def dynmap_config_user_queue_limit(self, ctx: commands.Context, limit: int) -> None:
+    """Sets the maximum number of renders that a user can have queued per target, including a running render (0 to disable). Staff are not limited."""
+    await self.config.render_user_queue_limit.set(limit)
+    self.settings_cache.invalidate()
+    await ctx.send(f'User queue limit set to `{limit}`.')
+
+  @dynmap_config.command(name='shortest_first')
+  @checks.admin_or_permissions()
+  @app_commands.default_permissions(administrator=True)
+  @app_commands.checks.has_permissions(administrator=True)
+  async def dynmap_config_shortest_first(self, ctx: commands.Context, enabled: bool) -> None:
+    """Sets whether queued renders are ordered shortest first, by their estimated duration, within each user's turn."""
+    await self.config.render_shortest_first.set(enabled)
+    self.settings_cache.invalidate()
+    await ctx.send(f'Shortest render first set to `{enabled}`.')
+
+  @dynmap_config.command(name='target_add')
+  @checks.admin_or_permissions()
+  @app_commands.default_permissions(administrator=True)
+  @app_commands.checks.has_permissions(administrator=True)
+  async def dynmap_config_target_add(self, ctx: commands.Context, name: str, world: str, dimension: str, server_id: str = None) -> None:
+    """Adds or replaces a render target: a world and dimension to render, optionally on another Pterodactyl server."""
+    async with self.config.render_targets() as render_targets:
+      render_targets[name] = {
+        'server_id': server_id,
+        'world': world,
+        'dimension': dimension
+      }
+    self.settings_cache.invalidate()
+    await ctx.send(f'Render target `{name}` set to world `{world}` and dimension `{dimension}`.')
+
+  @dynmap_config.command(name='target_remove')
+  @checks.admin_or_permissions()
+  @app_commands.default_permissions(administrator=True)
+  @app_commands.checks.has_permissions(administrator=True)
+  async def dynmap_config_target_remove(self, ctx: commands.Context, name: str) -> None:
+    """Removes a render target."""
+    async with self.config.render_targets() as render_targets:
+      removed_target = render_targets.pop(name, None)
+    self.settings_cache.invalidate()
+
+    if removed_target is None:
+      await ctx.send(f'Render target `{name}` does not exist.')
+    else:
+      await ctx.send(f'Render target `{name}` removed.')
+
+  @dynmap_config.command(name='target_set')
+  @checks.admin_or_permissions()
+  @app_commands.default_permissions(administrator=True)
+  @app_commands.checks.has_permissions(administrator=True)
+  async def dynmap_config_target_set(self, ctx: commands.Context, name: str, setting: Literal['queue_size', 'command_timeout', 'render_timeout'], value: int) -> None:
+    """Overrides the queue size or a timeout for a render target (0 to use the global setting)."""
+    key = {
+      'queue_size': 'queue_size',
+      'command_timeout': 'command_timeout_in_seconds',
+      'render_timeout': 'render_timeout_in_seconds'
+    }[setting]
+
+    async with self.config.render_targets() as render_targets:
+      if name not in render_targets:
+        await ctx.send(f'Render target `{name}` does not exist.')
+        return
+      render_targets[name][key] = value or None
+    self.settings_cache.invalidate()
+    await ctx.send(f'`{setting}` of render target `{name}` set to `{value}`.')
+
+  @dynmap_config.command(name='target_list')
+  @checks.admin_or_permissions()
+  @app_commands.default_permissions(administrator=True)
+  @app_commands.checks.has_permissions(administrator=True)
+  async def dynmap_config_target_list(self, ctx: commands.Context) -> None:
+    """Displays all render targets, including the default target made from the global settings."""
+    settings = await self.settings_cache.get()
+
+    output = '{:<20} | {:<20} | {:<20} | {:<10} | {:<10} | {:<10}\n'.format('Target', 'World', 'Dimension', 'Queue', 'Command', 'Render')
+    for name, target in settings.get_targets().items():
+      output += '{:<20} | {:<20} | {:<20} | {:<10} | {:<10} | {:<10}\n'.format(
+        name,
+        target.render_world,
+        target.render_dimension,
+        target.render_queue_size,
+        target.command_timeout_in_seconds,
+        target.render_timeout_in_seconds)
+    for page in pagify(output):
+      await ctx.send(f'```{page}```')
+
+  @dynmap_config.command(name='stats_file')
+  @checks.admin_or_permissions()
+  @app_commands.default_permissions(administrator=True)
+  @app_commands.checks.has_permissions(administrator=True)
+  async def dynmap_config_stats_file(self, ctx: commands.Context, path: str = None) -> None:
+    """Sets the file that render timings are written to after every render, in Prometheus text format (omit to disable)."""
+    await self.config.stats_prometheus_path.set(path)
+    self.settings_cache.invalidate()
+
+    if path is None:
+      await ctx.send('Stats file disabled.')
+    else:
+      await ctx.send(f'Stats file set to `{path}`.')
+
+  @dynmap_config.command(name='stats')
+  @checks.admin_or_permissions()
+  @app_commands.default_permissions(administrator=True)
+  @app_commands.checks.has_permissions(administrator=True)
+  async def dynmap_config_stats(self, ctx: commands.Context) -> None:
+    """Displays the timings of each phase of recent renders, the tiles per second of recent renders of each world, and failure and event counts since the cog was loaded."""
+    for page in pagify(self.stats.format_table()):
+      await ctx.send(f'```{page}```')
+
   @dynmap_config.command(name='clear_queue')
   @checks.admin_or_permissions()
   @app_commands.default_permissions(administrator=True)
   @app_commands.checks.has_permissions(administrator=True)
   async def dynmap_clear_queue(self, ctx: commands.Context) -> None:
-    """Clears the queue of current Dynmap renders. Caution: all current renders will likely fail."""
-    await self.config.render_queue.clear()
+    """Clears the queues of current Dynmap renders of all targets. Caution: all current renders will likely fail."""
+    self.render_queue.clear()
     await ctx.send('Render queue cleared.')
\ No newline at end of file
@@ -0,0 +1,474 @@
+from aiohttp import ClientSession, ClientWebSocketResponse, WSMsgType
+from asyncio import Event, Lock, Queue, QueueEmpty, Task, create_task, sleep, wait_for
+from base64 import urlsafe_b64decode
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import reduce
+from time import time
+from timeit import default_timer as timer
+from typing import Callable, Iterator, Pattern, Tuple
+from urllib.parse import urljoin
+
+from .console import ConsoleMatcher, ConsoleWaiter, strip_ansi_control_sequences
+from .helpers import RenderFailedError, RenderTimeoutError
+from .settings import DynmapSettings, DynmapSettingsCache
+from .stats import COUNTER_CONSOLE_LINES, COUNTER_CONSOLE_LINES_DROPPED, PHASE_CONSOLE_DISPATCH, PHASE_CREDENTIALS, PHASE_HEARTBEAT, PHASE_WEBSOCKET_AUTH, PHASE_WEBSOCKET_CONNECT, DynmapStats
+
+import json
+
+# A console line stripped of ANSI control sequences, the casefolded line, and the time it was received
+ConsoleLine = Tuple[str, str, float]
+
+# The token's expiry is tracked from its lifetime and the local time it was received when the token has an 'iat' claim,
+# so that a difference between the clocks of the bot and the panel does not make a fresh token look expired.
+@dataclass(frozen = True)
+class WebsocketCredentials:
+  socket: str
+  token: str
+  expires_at: float = None          # Unix time of the token's 'exp' claim, or None if the token could not be decoded
+  lifetime_in_seconds: float = None # 'exp' minus 'iat', or None if the token has no 'iat' claim
+  received_at: float = field(default_factory = time)
+
+  def get_remaining_time_in_seconds(self) -> float | None:
+    if self.lifetime_in_seconds is not None:
+      return self.received_at + self.lifetime_in_seconds - time()
+    elif self.expires_at is not None:
+      return self.expires_at - time()
+    return None
+
+  def is_valid_for(self, seconds: float) -> bool:
+    remaining_time_in_seconds = self.get_remaining_time_in_seconds()
+    return remaining_time_in_seconds is not None and remaining_time_in_seconds > seconds
+
+  # Seconds until the token should be refreshed, the margin before it expires.
+  # A token that lives no longer than the margin is refreshed halfway through its lifetime instead.
+  def get_refresh_delay(self, margin_in_seconds: float) -> float | None:
+    remaining_time_in_seconds = self.get_remaining_time_in_seconds()
+    if remaining_time_in_seconds is None:
+      return None
+
+    if self.lifetime_in_seconds is not None:
+      margin_in_seconds = min(margin_in_seconds, self.lifetime_in_seconds / 2)
+
+    return remaining_time_in_seconds - margin_in_seconds
+
+# Reads the 'exp' claim and the lifetime of a JWT without verifying its signature, which only the Pterodactyl server needs to do.
+def decode_jwt_expiry(token: str) -> Tuple[float | None, float | None]:
+  try:
+    payload = token.split('.')[1]
+    payload_json = json.loads(urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+    expires_at = float(payload_json['exp'])
+  except (IndexError, KeyError, TypeError, ValueError):
+    return None, None
+
+  try:
+    return expires_at, expires_at - float(payload_json['iat'])
+  except (KeyError, TypeError, ValueError):
+    return expires_at, None
+
+# Keeps a single authenticated websocket to a Pterodactyl server open, shared by all renders on that server.
+# The websocket can be opened ahead of the first command, and is kept alive with pings. It is reconnected in the
+# background with backoff when it is lost, and on demand whenever a command is sent and there is no open websocket.
+# Resumable waiters, such as those for the end of a render, are kept while it is reconnected, so that a short network
+# outage does not fail a render that Dynmap keeps running.
+# A single reader task reads the console stream once, drops the lines no waiter or listener could be interested in, and
+# queues the rest for a dispatcher task, which hands them to the registered waiters and listeners.
+class PterodactylConnection:
+  # Refresh the websocket token this many seconds before it expires.
+  # Pterodactyl sends a 'token expiring' event 60 seconds before expiry, so this refresh normally happens first.
+  TOKEN_REFRESH_MARGIN_IN_SECONDS = 90
+  TOKEN_REFRESH_RETRY_DELAY_IN_SECONDS = 5
+
+  # Ping the server this often, and close the websocket after this many pings in a row go unanswered
+  HEARTBEAT_INTERVAL_IN_SECONDS = 30
+  HEARTBEAT_TIMEOUT_IN_SECONDS = 10
+  MAX_MISSED_HEARTBEATS = 2
+
+  # Delay before the first attempt to reconnect, doubled after every failed attempt
+  RECONNECT_DELAY_IN_SECONDS = 1
+  MAX_RECONNECT_DELAY_IN_SECONDS = 30
+
+  # Resumable waiters are failed if no websocket could be opened for this long
+  RESUME_TIMEOUT_IN_SECONDS = 120
+
+  # Console lines waiting for the dispatcher, beyond which the reader stops reading from the websocket
+  CONSOLE_QUEUE_SIZE = 1000
+
+  def __init__(self, settings_cache: DynmapSettingsCache, server_id: str, stats: DynmapStats):
+    self.settings_cache = settings_cache
+    self.server_id = server_id
+    self.stats = stats
+
+    self.session: ClientSession = None
+    self.ws: ClientWebSocketResponse = None
+    self.ws_settings: DynmapSettings = None
+    self.reader: Task = None
+
+    self.credentials: WebsocketCredentials = None
+    self.refresher: Task = None
+    self.refresh_requested = Event()
+
+    self.heartbeat: Task = None
+    self.pong_received = Event()
+
+    # Set once the connection is closed for good, so that it is no longer reconnected in the background
+    self.stopped = False
+    self.reconnector: Task = None
+
+    # Set when the websocket is lost, until a new one is open and the resumable waiters have been told
+    self.interrupted = False
+
+    self.matcher = ConsoleMatcher()
+    self.connect_lock = Lock()
+
+  @property
+  def connected(self) -> bool:
+    return self.ws is not None and not self.ws.closed
+
+  # Registers a waiter for the duration of the block.
+  # Register the waiter before sending the command whose response it waits for, so that the response cannot be missed.
+  @contextmanager
+  def wait_for_console(self, success_response: str = None, failure_response: str = None, success_pattern: Pattern = None, resumable: bool = False) -> Iterator[ConsoleWaiter]:
+    waiter = ConsoleWaiter(success_response, failure_response, success_pattern, resumable)
+    self.matcher.add_waiter(waiter)
+    try:
+      yield waiter
+    finally:
+      self.matcher.remove_waiter(waiter)
+      waiter.close()
+
+  # Registers a function that is called with every console line containing the keyword, or with every console line if no
+  # keyword is given, for as long as the connection exists. Listeners run on the dispatcher task, so they must not block,
+  # or the console queue fills up and the reader stops reading from the websocket.
+  def add_listener(self, listener: Callable[[str], None], keyword: str = None) -> None:
+    self.matcher.add_listener(listener, keyword)
+
+  # Registers a listener for the duration of the block
+  @contextmanager
+  def listen_to_console(self, listener: Callable[[str], None], keyword: str = None) -> Iterator[None]:
+    self.matcher.add_listener(listener, keyword)
+    try:
+      yield
+    finally:
+      self.matcher.remove_listener(listener)
+
+  async def ensure_connected(self) -> None:
+    settings = await self.settings_cache.get()
+
+    async with self.connect_lock:
+      # Reconnect if the Pterodactyl settings have changed since the websocket was opened
+      if self.connected and not self.is_same_server(settings, self.ws_settings):
+        await self.ws.close()
+
+      if not self.connected:
+        await self.connect(settings)
+
+  async def connect(self, settings: DynmapSettings) -> None:
+    if self.session is None or self.session.closed:
+      self.session = ClientSession()
+
+    # Reuse the cached credentials if they were issued for the same server and are not about to expire
+    if self.credentials is None or not self.is_same_server(settings, self.ws_settings) or not self.credentials.is_valid_for(self.TOKEN_REFRESH_MARGIN_IN_SECONDS):
+      with self.stats.measure(PHASE_CREDENTIALS):
+        self.credentials = await self.get_websocket_credentials(settings)
+
+    # Pings are answered and timed by the reader and heartbeat tasks, instead of by aiohttp
+    with self.stats.measure(PHASE_WEBSOCKET_CONNECT):
+      ws = await self.session.ws_connect(self.credentials.socket, autoping = False)
+
+    try:
+      with self.stats.measure(PHASE_WEBSOCKET_AUTH):
+        await self.authenticate_websocket(ws, self.credentials.token, settings.auth_timeout_in_seconds)
+    except:
+      await ws.close()
+      self.credentials = None
+      raise
+
+    self.ws = ws
+    self.ws_settings = settings
+    self.reader = create_task(self.read_events(ws))
+    self.refresher = create_task(self.refresh_credentials(ws))
+    self.heartbeat = create_task(self.keep_alive(ws))
+
+    if self.interrupted:
+      self.interrupted = False
+      self.matcher.resume_waiters()
+
+  async def close(self) -> None:
+    self.stopped = True
+
+    for task in [self.reader, self.refresher, self.heartbeat, self.reconnector]:
+      if task is not None:
+        task.cancel()
+
+    self.reader = None
+    self.refresher = None
+    self.heartbeat = None
+    self.reconnector = None
+
+    if self.ws is not None:
+      await self.ws.close()
+      self.ws = None
+
+    if self.session is not None:
+      await self.session.close()
+      self.session = None
+
+  async def send_command(self, command: str) -> None:
+    await self.ensure_connected()
+    await self.ws.send_json(self.create_command_request_json(command))
+
+  async def get_websocket_credentials(self, settings: DynmapSettings) -> WebsocketCredentials:
+    pterodactyl_host = settings.pterodactyl_api_host
+    pterodactyl_key = settings.pterodactyl_api_key
+    pterodactyl_id = self.server_id
+
+    if pterodactyl_host is None:
+      raise RenderFailedError('Pterodactyl API host URL must be set in the config.')
+    elif pterodactyl_key is None:
+      raise RenderFailedError('Pterodactyl API client key must be set in the config.')
+    elif pterodactyl_id is None:
+      raise RenderFailedError('Pterodactyl API server ID must be set in the config.')
+
+    websocket_url = reduce(urljoin, [pterodactyl_host, 'api/client/servers/', pterodactyl_id + '/', 'websocket'])
+    headers = {
+      'Accept': 'application/json',
+      'Content-Type': 'application/json',
+      'Authorization': f'Bearer {pterodactyl_key}'
+    }
+    async with self.session.get(websocket_url, headers = headers) as response:
+      status_code = response.status
+
+      if status_code != 200:
+        raise RenderFailedError(f'Unable to get websocket credentials. Status code: `{status_code}`.')
+
+      response_json = await response.json()
+      ws_socket = response_json['data']['socket']
+      ws_token = response_json['data']['token']
+
+      return WebsocketCredentials(ws_socket, ws_token, *decode_jwt_expiry(ws_token))
+
+  async def authenticate_websocket(self,
+    ws: ClientWebSocketResponse,
+    ws_token: str,
+    auth_timeout_in_seconds: int) -> None:
+
+    await ws.send_json(self.create_auth_request_json(ws_token))
+
+    # Bound each receive by the remaining time, so that a silent server cannot hold the authentication past its timeout
+    deadline_in_seconds = timer() + auth_timeout_in_seconds
+
+    try:
+      while True:
+        event_json = await wait_for(ws.receive_json(), timeout = max(deadline_in_seconds - timer(), 0))
+
+        if event_json['event'] == 'auth success':
+          return
+        elif event_json['event'] == 'jwt error':
+          raise RenderFailedError('Websocket authentication failed. Check your console or logs for details.')
+
+    except TimeoutError:
+      raise RenderTimeoutError('Timed out while authenticating websocket.')
+
+  # Reads every event from the websocket, and fails all waiters if the websocket closes.
+  # Console lines that pass the prefilter are queued for the dispatcher. When the queue is full, the reader waits for the
+  # dispatcher to catch up instead of reading on, so that unread messages are held back by aiohttp's flow control and
+  # the socket instead of piling up in memory.
+  async def read_events(self, ws: ClientWebSocketResponse) -> None:
+    console_lines: Queue[ConsoleLine] = Queue(self.CONSOLE_QUEUE_SIZE)
+    dispatcher = create_task(self.dispatch_console_lines(console_lines))
+
+    try:
+      async for ws_message in ws:
+        if ws_message.type == WSMsgType.TEXT:
+          await self.handle_websocket_event(ws_message.json(), console_lines)
+        elif ws_message.type == WSMsgType.PING:
+          await ws.pong(ws_message.data)
+        elif ws_message.type == WSMsgType.PONG:
+          self.pong_received.set()
+
+    except Exception as ex:
+      print(f'Pterodactyl websocket error: {ex!r}', flush = True)
+
+    finally:
+      dispatcher.cancel()
+
+      self.drain_console_lines(console_lines)
+
+      if not ws.closed:
+        await ws.close()
+
+      # Leave the waiters and token refresh alone if a new websocket has already replaced this one
+      if self.ws is ws:
+        if self.refresher is not None:
+          self.refresher.cancel()
+        if self.heartbeat is not None:
+          self.heartbeat.cancel()
+
+        self.interrupted = True
+        self.fail_waiters(RenderFailedError('Lost connection to the Pterodactyl websocket.'), keep_resumable = True)
+        self.schedule_reconnect()
+
+  # Processes incoming events from the Pterodactyl API websocket.
+  # Requests a token refresh if the token is expiring or expired.
+  # Console output is stripped of ANSI control sequences and casefolded once. Lines that contain none of the responses
+  # and keywords of the waiters and listeners are counted and dropped, and the rest are queued for the dispatcher.
+  async def handle_websocket_event(self, event_json: dict, console_lines: Queue[ConsoleLine]) -> None:
+    event = event_json['event']
+
+    if event == 'console output':
+      line = strip_ansi_control_sequences(event_json['args'][0])
+      folded_line = line.casefold()
+
+      self.stats.count(COUNTER_CONSOLE_LINES)
+      if not self.matcher.is_relevant(folded_line):
+        self.stats.count(COUNTER_CONSOLE_LINES_DROPPED)
+        return
+
+      await console_lines.put((line, folded_line, timer()))
+
+    elif event == 'jwt error':
+      self.drain_console_lines(console_lines)
+
+      arg = event_json['args'][0]
+      if arg == 'jwt: exp claim is invalid':
+        self.fail_waiters(RenderFailedError('Websocket token expired.'))
+      else:
+        print(f'JWT Error: {arg}', flush = True)
+        self.fail_waiters(RenderFailedError('Websocket failure. Check your console or logs for details.'))
+
+    elif event == 'token expiring' or event == 'token expired':
+      # Normally unreachable, since the token is refreshed before it starts expiring.
+      # The refresh runs in the background, so the reader keeps handing console lines to waiters meanwhile.
+      self.refresh_requested.set()
+
+  # Hands queued console lines to the waiters and listeners. Waiters only resolve futures and listeners must not block,
+  # so any Discord I/O that follows a line runs on the tasks awaiting the waiters, not here.
+  async def dispatch_console_lines(self, console_lines: Queue[ConsoleLine]) -> None:
+    while True:
+      self.dispatch_console_line(await console_lines.get())
+
+  def dispatch_console_line(self, console_line: ConsoleLine) -> None:
+    line, folded_line, received_time_in_seconds = console_line
+    self.matcher.match(line, folded_line)
+    self.stats.record(PHASE_CONSOLE_DISPATCH, timer() - received_time_in_seconds)
+
+  # Hands over the lines that were already received before failing the waiters, since they may include the response a waiter is waiting for
+  def drain_console_lines(self, console_lines: Queue[ConsoleLine]) -> None:
+    while True:
+      try:
+        self.dispatch_console_line(console_lines.get_nowait())
+      except QueueEmpty:
+        return
+
+  # Re-authenticates the websocket with a fresh token shortly before the current token expires,
+  # or immediately if the server reports that the token is expiring.
+  async def refresh_credentials(self, ws: ClientWebSocketResponse) -> None:
+    while not ws.closed:
+      # Wait at least the retry delay, so that a token that is already due, for example because the panel's clock is
+      # behind, cannot make the loop request credentials back to back
+      refresh_delay_in_seconds = None
+      if self.credentials is not None:
+        refresh_delay_in_seconds = self.credentials.get_refresh_delay(self.TOKEN_REFRESH_MARGIN_IN_SECONDS)
+        if refresh_delay_in_seconds is not None:
+          refresh_delay_in_seconds = max(refresh_delay_in_seconds, self.TOKEN_REFRESH_RETRY_DELAY_IN_SECONDS)
+
+      try:
+        await wait_for(self.refresh_requested.wait(), timeout = refresh_delay_in_seconds)
+      except TimeoutError:
+        pass
+
+      self.refresh_requested.clear()
+
+      try:
+        with self.stats.measure(PHASE_CREDENTIALS):
+          self.credentials = await self.get_websocket_credentials(self.ws_settings)
+
+        # The 'auth success' event is consumed by the reader, so the new token is sent without waiting for it.
+        await ws.send_json(self.create_auth_request_json(self.credentials.token))
+
+      except Exception as ex:
+        print(f'Unable to refresh Pterodactyl websocket token: {ex!r}', flush = True)
+        await sleep(self.TOKEN_REFRESH_RETRY_DELAY_IN_SECONDS)
+        self.refresh_requested.set()
+
+  # Pings the server regularly, and records the round trip time of each ping.
+  # A websocket whose pings go unanswered is closed, so that it is replaced instead of silently missing console output.
+  async def keep_alive(self, ws: ClientWebSocketResponse) -> None:
+    missed_heartbeats = 0
+
+    while not ws.closed:
+      await sleep(self.HEARTBEAT_INTERVAL_IN_SECONDS)
+
+      self.pong_received.clear()
+      ping_time_in_seconds = timer()
+
+      try:
+        await ws.ping()
+        await wait_for(self.pong_received.wait(), timeout = self.HEARTBEAT_TIMEOUT_IN_SECONDS)
+
+      except TimeoutError as ex:
+        self.stats.record_failure(PHASE_HEARTBEAT, ex)
+        missed_heartbeats += 1
+
+        if missed_heartbeats >= self.MAX_MISSED_HEARTBEATS:
+          print(f'Pterodactyl websocket missed {missed_heartbeats} heartbeats, reconnecting.', flush = True)
+          await ws.close()
+          return
+
+        continue
+
+      except ConnectionError:
+        return
+
+      missed_heartbeats = 0
+      self.stats.record(PHASE_HEARTBEAT, timer() - ping_time_in_seconds)
+
+  def schedule_reconnect(self) -> None:
+    if not self.stopped and (self.reconnector is None or self.reconnector.done()):
+      self.reconnector = create_task(self.reconnect())
+
+  # Opens a new websocket in the background after the previous one was lost, so that resumable waiters can pick up where
+  # they left off, and so that the next command does not have to wait for it. Attempts are spaced out further after each
+  # failure, and given up on once the resumable waiters are failed, after which the next command connects on demand instead.
+  async def reconnect(self) -> None:
+    disconnected_time_in_seconds = timer()
+    reconnect_delay_in_seconds = self.RECONNECT_DELAY_IN_SECONDS
+
+    while not self.stopped:
+      await sleep(reconnect_delay_in_seconds)
+
+      try:
+        await self.ensure_connected()
+        return
+      except Exception as ex:
+        print(f'Unable to reconnect to the Pterodactyl websocket: {ex!r}', flush = True)
+
+      if timer() - disconnected_time_in_seconds >= self.RESUME_TIMEOUT_IN_SECONDS:
+        self.fail_waiters(RenderFailedError('Lost connection to the Pterodactyl websocket.'))
+        return
+
+      reconnect_delay_in_seconds = min(reconnect_delay_in_seconds * 2, self.MAX_RECONNECT_DELAY_IN_SECONDS)
+
+  def fail_waiters(self, ex: Exception, keep_resumable: bool = False) -> None:
+    self.matcher.fail_waiters(ex, keep_resumable)
+
+  # The server ID is fixed for each connection, so only the API host and key can change
+  @staticmethod
+  def is_same_server(a: DynmapSettings, b: DynmapSettings) -> bool:
+    return (a.pterodactyl_api_host == b.pterodactyl_api_host
+      and a.pterodactyl_api_key == b.pterodactyl_api_key)
+
+  @staticmethod
+  def create_auth_request_json(ws_token: str) -> object:
+    return {
+      'event': 'auth',
+      'args': [ws_token]
+    }
+
+  @staticmethod
+  def create_command_request_json(command: str) -> object:
+    return {
+      'event': 'send command',
+      'args': [command]
+    }
\ No newline at end of file
@@ -0,0 +1,161 @@
+from asyncio import Event, Future, get_running_loop
+from collections import Counter
+from typing import Callable, List, Pattern, Set, Tuple
+
+from .helpers import ConsoleResponseResult
+
+import re
+
+ANSI_CONTROL_SEQUENCE_REGEX = re.compile(r'(\x9B|\x1B\[)[0-?]*[ -\/]*[@-~]')
+
+# Most console lines contain no control sequences, and are returned without running the regex
+def strip_ansi_control_sequences(s: str) -> str:
+  if '\x1b' not in s and '\x9b' not in s:
+    return s
+  return ANSI_CONTROL_SEQUENCE_REGEX.sub('', s)
+
+# Waits for the first console line that contains either the success or the failure response (case-insensitive).
+# Lines are stripped of ANSI control sequences and casefolded once by the reader before being offered to each waiter.
+# If a success pattern is given, a line containing the success response must also match it, so that waiters for
+# responses that share the same text can be told apart by the shape of the rest of the line.
+# A resumable waiter is kept when the websocket is lost, and its resumed event is set once a new websocket is open, so
+# that its owner can check whether the response was written while no websocket was open.
+class ConsoleWaiter:
+  def __init__(self, success_response: str = None, failure_response: str = None, success_pattern: Pattern = None, resumable: bool = False):
+    self.success_response = success_response.casefold() if success_response else None
+    self.failure_response = failure_response.casefold() if failure_response else None
+    self.success_pattern = success_pattern
+    self.resumable = resumable
+
+    self.future: Future[Tuple[ConsoleResponseResult, str]] = get_running_loop().create_future()
+    self.resumed = Event()
+
+  @property
+  def keywords(self) -> List[str]:
+    return [response for response in (self.success_response, self.failure_response) if response]
+
+  # Returns whether the line resolved the waiter
+  def match(self, line: str, folded_line: str) -> bool:
+    if self.future.done():
+      return False
+
+    if self.success_response and self.success_response in folded_line:
+      if self.success_pattern is None or self.success_pattern.search(line):
+        self.future.set_result((ConsoleResponseResult.SUCCESS, line))
+        return True
+    elif self.failure_response and self.failure_response in folded_line:
+      self.future.set_result((ConsoleResponseResult.FAILURE, line))
+      return True
+
+    return False
+
+  def fail(self, ex: Exception) -> None:
+    if not self.future.done():
+      self.future.set_exception(ex)
+
+  def resume(self) -> None:
+    if not self.future.done():
+      self.resumed.set()
+
+  def close(self) -> None:
+    if not self.future.done():
+      self.future.cancel()
+    elif not self.future.cancelled():
+      # Mark any exception as retrieved, so that asyncio does not log it when nobody waited for this waiter
+      self.future.exception()
+
+# Offers console lines to the registered waiters and listeners.
+# The responses of every waiter and the keywords of every listener are compiled into a single regex, which is rebuilt
+# only when they change. Most lines contain none of them, and cost one search of that regex no matter how many waiters
+# and listeners there are. Lines that do contain one are offered to the waiters and to the listeners whose keyword they contain.
+class ConsoleMatcher:
+  def __init__(self):
+    self.waiters: Set[ConsoleWaiter] = set()
+    self.listeners: List[Tuple[Callable[[str], None], str | None]] = []
+
+    # Casefolded keywords by the number of waiters and listeners that registered them
+    self.keyword_counts: Counter[str] = Counter()
+    self.unfiltered_listener_count = 0
+
+    self.keyword_regex: Pattern = None
+    self.keyword_regex_stale = False
+
+  def add_waiter(self, waiter: ConsoleWaiter) -> None:
+    self.waiters.add(waiter)
+    self.add_keywords(waiter.keywords)
+
+  def remove_waiter(self, waiter: ConsoleWaiter) -> None:
+    if waiter in self.waiters:
+      self.waiters.remove(waiter)
+      self.remove_keywords(waiter.keywords)
+
+  # Listeners with a keyword are only called with lines that contain it (case-insensitive), and listeners without one with every line
+  def add_listener(self, listener: Callable[[str], None], keyword: str = None) -> None:
+    keyword = keyword.casefold() if keyword else None
+    self.listeners.append((listener, keyword))
+
+    if keyword is None:
+      self.unfiltered_listener_count += 1
+    else:
+      self.add_keywords([keyword])
+
+  def remove_listener(self, listener: Callable[[str], None]) -> None:
+    for i, (registered_listener, keyword) in enumerate(self.listeners):
+      if registered_listener == listener:
+        del self.listeners[i]
+
+        if keyword is None:
+          self.unfiltered_listener_count -= 1
+        else:
+          self.remove_keywords([keyword])
+        return
+
+  def add_keywords(self, keywords: List[str]) -> None:
+    for keyword in keywords:
+      if self.keyword_counts[keyword] == 0:
+        self.keyword_regex_stale = True
+      self.keyword_counts[keyword] += 1
+
+  def remove_keywords(self, keywords: List[str]) -> None:
+    for keyword in keywords:
+      self.keyword_counts[keyword] -= 1
+      if self.keyword_counts[keyword] <= 0:
+        del self.keyword_counts[keyword]
+        self.keyword_regex_stale = True
+
+  def get_keyword_regex(self) -> Pattern | None:
+    if self.keyword_regex_stale:
+      # Longest first, so that a keyword is not shadowed by another keyword it starts with
+      keywords = sorted(self.keyword_counts, key = len, reverse = True)
+      self.keyword_regex = re.compile('|'.join(re.escape(keyword) for keyword in keywords)) if keywords else None
+      self.keyword_regex_stale = False
+
+    return self.keyword_regex
+
+  # Returns whether any waiter or listener could be interested in the casefolded line
+  def is_relevant(self, folded_line: str) -> bool:
+    if self.unfiltered_listener_count > 0:
+      return True
+
+    keyword_regex = self.get_keyword_regex()
+    return keyword_regex is not None and keyword_regex.search(folded_line) is not None
+
+  # Offers a line, already stripped of ANSI control sequences, and returns the waiters it resolved
+  def match(self, line: str, folded_line: str) -> List[ConsoleWaiter]:
+    if not self.is_relevant(folded_line):
+      return []
+
+    for listener, keyword in list(self.listeners):
+      if keyword is None or keyword in folded_line:
+        listener(line)
+
+    return [waiter for waiter in list(self.waiters) if waiter.match(line, folded_line)]
+
+  def fail_waiters(self, ex: Exception, keep_resumable: bool = False) -> None:
+    for waiter in list(self.waiters):
+      if not (keep_resumable and waiter.resumable):
+        waiter.fail(ex)
+
+  def resume_waiters(self) -> None:
+    for waiter in list(self.waiters):
+      waiter.resume()
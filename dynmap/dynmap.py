@@ -1,25 +1,43 @@
-from aiohttp import ClientSession, ClientWebSocketResponse
-from asyncio import sleep
-from dataclasses import dataclass
-from discord import Color, Embed, Interaction, Message, User
-from enum import Enum
-from functools import reduce
-from http.client import HTTPException
+from asyncio import FIRST_COMPLETED, Task, create_task, gather, to_thread, wait, wait_for
+from discord import Color, Embed, Interaction, Member, Message, User
+from discord.errors import HTTPException
 from redbot.core import Config, app_commands, commands
 from redbot.core.bot import Red
+from redbot.core.utils.mod import is_mod_or_superior
+from time import time
 from timeit import default_timer as timer
-from typing import List, Tuple
-from urllib.parse import urljoin
+from typing import Dict, List, Tuple
 
 from .config import DynmapConfig
+from .connection import PterodactylConnection
+from .console import ConsoleWaiter
 from .events import DynmapEvents
+from .history import RenderHistory, RenderRecord
+from .helpers import ConsoleResponseResult, DynmapParameters, RenderCancelledError, RenderFailedError, RenderTimeoutError
+from .players import ENTITY_DATA_DIMENSION_REGEX, ENTITY_DATA_KEYWORD, ENTITY_DATA_POSITION_REGEX, PlayerLocationCache
+from .progress import RENDER_PROGRESS_KEYWORD, RenderProgress
+from .render_queue import RenderJob, RenderQueue
+from .scheduling import RenderPriority
+from .settings import DynmapSettings, DynmapSettingsCache
+from .spatial import RenderArea, cover_path, cover_rectangle, spiral_order
+from .stats import PHASE_PLAYER_LOOKUP, PHASE_QUEUE_WAIT, PHASE_RENDER, PHASE_RENDER_START, PHASE_REQUEST, DynmapStats
+from .status import StatusMessages
 
 import re
 
+WAYPOINT_REGEX = re.compile(r'(?P<x>-?\d+),(?P<z>-?\d+)')
+
+# Line of the "/dynmap stats" output that lists the worlds with a running render, separated by spaces or commas
+ACTIVE_RENDER_JOBS_REGEX = re.compile(r'Active render jobs:(?P<worlds>.*)$', re.IGNORECASE)
+
 # If these constants are changed, restart the bot and run "[p]slash sync" to update the slash commands with the new limits.
 MAX_COORDINATE = 30000
 MIN_RADIUS = 100
 MAX_RADIUS = 300
+MAX_LARGE_RADIUS = 2000
+MAX_PATH_WIDTH = 150
+MAX_BATCH_PARTS = 50
+MAX_USER_BATCH_PARTS = 10
 
 class AppCommandHelpers:
   def get_dimension_range() -> commands.Range:
@@ -28,6 +46,12 @@ class AppCommandHelpers:
   def get_radius_range() -> commands.Range:
     return commands.Range[int, MIN_RADIUS, MAX_RADIUS]
 
+  def get_large_radius_range() -> commands.Range:
+    return commands.Range[int, MIN_RADIUS, MAX_LARGE_RADIUS]
+
+  def get_path_width_range() -> commands.Range:
+    return commands.Range[int, 0, MAX_PATH_WIDTH]
+
 # Discord bug?: Autocomplete options fail to load in Discord when using integers, but they do load for strings.
 # async def radius_autocomplete(interaction: Interaction, current: int) -> List[app_commands.Choice[int]]:
 #   radii = [100, 150, 200, 250, 300]
@@ -43,27 +67,6 @@ async def radius_autocomplete(interaction: Interaction, current: str) -> List[ap
     for radius in radii if current in radius
   ]
 
-@dataclass
-class DynmapParameters:
-  player: str = None
-  x: int = None
-  z: int = None
-  radius: int = None
-
-class ConsoleResponseResult(Enum):
-  SUCCESS = 1
-  FAILURE = 2
-  TIMEOUT = 3
-
-class RenderCancelledError(Exception):
-  pass
-
-class RenderFailedError(Exception):
-  pass
-
-class RenderTimeoutError(Exception):
-  pass
-
 class Dynmap(DynmapConfig, DynmapEvents, commands.Cog):
   """Allows users to run Dynmap radius renders on a Minecraft server hosted on Pterodactyl."""
 
@@ -74,6 +77,14 @@ class Dynmap(DynmapConfig, DynmapEvents, commands.Cog):
   CONSOLE_MESSAGE_RENDER_ALREADY_RUNNING = 'Radius render of world \'{world}\' already active.'
   CONSOLE_MESSAGE_RENDER_FINISHED = 'Radius render of \'{world}\' finished.'
   CONSOLE_MESSAGE_RENDER_CANCELLED = 'Cancelled render for \'{world}\''
+  CONSOLE_MESSAGE_ACTIVE_RENDER_JOBS = 'Active render jobs:'
+
+  # Renders with an estimated duration time out after this many times their estimated duration, plus the grace period.
+  # Estimates are only trusted for timeouts once this many renders of the world have completed.
+  # Renders are never allowed longer than the render timeout.
+  RENDER_TIMEOUT_ESTIMATE_FACTOR = 3
+  RENDER_TIMEOUT_GRACE_PERIOD_IN_SECONDS = 60
+  RENDER_TIMEOUT_MIN_SAMPLES = 5
 
   UNICODE_WHITE_CHECK_MARK = '\U00002705'
   UNICODE_X = '\U0000274C'
@@ -94,46 +105,127 @@ class Dynmap(DynmapConfig, DynmapEvents, commands.Cog):
       'web_map': 'flat',
       'web_zoom': 6,
       'web_y': 64,
-      'queued_render_start_delay_in_seconds': 3,
       'elapsed_time_interval_in_seconds': 5,
-      'cancellation_check_interval_in_seconds': 1,
       'auth_timeout_in_seconds': 10,
       'command_timeout_in_seconds': 10,
       'render_timeout_in_seconds': 600,
-      'render_queue': []
+      'player_cache_ttl_in_seconds': 10,
+      'render_freshness_window_in_seconds': 300,
+      'render_user_queue_limit': 2,
+      'render_shortest_first': False,
+      'stats_prometheus_path': None,
+      'render_targets': {},
+      'render_queue': [],
+      'render_history': []
     }
     self.config = Config.get_conf(self, identifier = 394817415689018, force_registration = True)
     self.config.register_global(**default_config)
 
+    self.settings_cache = DynmapSettingsCache(self.config)
+    self.stats = DynmapStats()
+    self.connections: Dict[str, PterodactylConnection] = {}
+
+    # Player locations seen on the console of each Pterodactyl server, by server ID, since the same player name can be
+    # on several servers
+    self.player_caches: Dict[str, PlayerLocationCache] = {}
+    self.render_queue = RenderQueue(self.config)
+    self.render_history = RenderHistory(self.config)
+    self.status_messages = StatusMessages(self.stats)
+
+    self.warm_task: Task = None
+    self.report_task: Task = None
+
+  async def cog_load(self) -> None:
+    # Renders from a previous session can no longer be followed, so start with an empty queue, and mark their status
+    # messages as interrupted instead of leaving them on their last status
+    interrupted_messages = await self.render_queue.load_interrupted()
+    self.render_queue.clear()
+
+    await self.render_history.load()
+
+    # Start the throughput stats from the renders of previous sessions, which are kept in the history
+    for record in self.render_history.records.values():
+      if record.server_id is not None and record.tiles_per_second is not None:
+        self.stats.record_throughput(record.server_id, record.world, record.tiles_per_second)
+
+    self.warm_task = create_task(self.warm_connections())
+    self.report_task = create_task(self.report_interrupted_renders(interrupted_messages))
+
+  async def cog_unload(self) -> None:
+    if self.warm_task is not None:
+      self.warm_task.cancel()
+    if self.report_task is not None:
+      self.report_task.cancel()
+
+    for connection in self.connections.values():
+      await connection.close()
+    await self.render_queue.flush()
+    await self.render_history.flush()
+
   @commands.hybrid_group(name='dynmap')
   async def dynmap(self, ctx: commands.Context) -> None:
     """Runs Dynmap renders."""
     if ctx.invoked_subcommand is None:
       pass
 
+  async def target_autocomplete(self, interaction: Interaction, current: str) -> List[app_commands.Choice[str]]:
+    settings = await self.settings_cache.get()
+    return [
+      app_commands.Choice(name = target, value = target)
+      for target in settings.get_targets() if current.casefold() in target.casefold()
+    ]
+
   @dynmap.command(name='render')
   @app_commands.guild_only()
-  @app_commands.describe(x = 'X coordinate', z = 'Z coordinate', radius = 'Radius (optional)')
-  @app_commands.autocomplete(radius = radius_autocomplete)
-  async def dynmap_render(self, ctx: commands.Context, x: AppCommandHelpers.get_dimension_range(), z: AppCommandHelpers.get_dimension_range(), radius: AppCommandHelpers.get_radius_range() = None) -> None:
+  @app_commands.describe(x = 'X coordinate', z = 'Z coordinate', radius = 'Radius (optional)', target = 'World to render (optional)')
+  @app_commands.autocomplete(radius = radius_autocomplete, target = target_autocomplete)
+  async def dynmap_render(self, ctx: commands.Context, x: AppCommandHelpers.get_dimension_range(), z: AppCommandHelpers.get_dimension_range(), radius: AppCommandHelpers.get_radius_range() = None, target: str = None) -> None:
     """Starts a Dynmap radius render centered on the specified coordinates."""
-    params = DynmapParameters(x = x, z = z, radius = radius)
+    params = DynmapParameters(x = x, z = z, radius = radius, target = target)
     await self.run_dynmap_render(ctx, params)
 
   @dynmap.command(name='player')
   @app_commands.guild_only()
-  @app_commands.describe(player = 'Minecraft username of the player', radius = 'Radius (optional)')
-  @app_commands.autocomplete(radius = radius_autocomplete)
-  async def dynmap_player(self, ctx: commands.Context, player: str, radius: AppCommandHelpers.get_radius_range() = None) -> None:
+  @app_commands.describe(player = 'Minecraft username of the player', radius = 'Radius (optional)', target = 'World to render (optional, defaults to the player\'s world)')
+  @app_commands.autocomplete(radius = radius_autocomplete, target = target_autocomplete)
+  async def dynmap_player(self, ctx: commands.Context, player: str, radius: AppCommandHelpers.get_radius_range() = None, target: str = None) -> None:
     """Starts a Dynmap radius render centred on the specified player."""
-    params = DynmapParameters(player = player, radius = radius)
+    params = DynmapParameters(player = player, radius = radius, target = target)
+    await self.run_dynmap_render(ctx, params)
+
+  @dynmap.command(name='render_large')
+  @app_commands.guild_only()
+  @app_commands.describe(x = 'X coordinate', z = 'Z coordinate', radius = 'Radius', target = 'World to render (optional)')
+  @app_commands.autocomplete(target = target_autocomplete)
+  async def dynmap_render_large(self, ctx: commands.Context, x: AppCommandHelpers.get_dimension_range(), z: AppCommandHelpers.get_dimension_range(), radius: AppCommandHelpers.get_large_radius_range(), target: str = None) -> None:
+    """Starts a batch of Dynmap radius renders covering a radius larger than the maximum radius (Staff only)."""
+    params = DynmapParameters(x = x, z = z, radius = radius, target = target, chunked = True)
+    await self.run_dynmap_render(ctx, params)
+
+  @dynmap.command(name='render_area')
+  @app_commands.guild_only()
+  @app_commands.describe(x1 = 'X coordinate of a corner', z1 = 'Z coordinate of a corner', x2 = 'X coordinate of the opposite corner', z2 = 'Z coordinate of the opposite corner', target = 'World to render (optional)')
+  @app_commands.autocomplete(target = target_autocomplete)
+  async def dynmap_render_area(self, ctx: commands.Context, x1: AppCommandHelpers.get_dimension_range(), z1: AppCommandHelpers.get_dimension_range(), x2: AppCommandHelpers.get_dimension_range(), z2: AppCommandHelpers.get_dimension_range(), target: str = None) -> None:
+    """Starts a batch of Dynmap radius renders covering the rectangle between two corners."""
+    params = DynmapParameters(corners = (x1, z1, x2, z2), target = target)
+    await self.run_dynmap_render(ctx, params)
+
+  @dynmap.command(name='render_path')
+  @app_commands.guild_only()
+  @app_commands.describe(waypoints = 'Coordinates of the waypoints, like "0,0 500,0 500,800"', width = 'Blocks to render on each side of the path (optional)', target = 'World to render (optional)')
+  @app_commands.autocomplete(target = target_autocomplete)
+  async def dynmap_render_path(self, ctx: commands.Context, waypoints: str, width: AppCommandHelpers.get_path_width_range() = None, target: str = None) -> None:
+    """Starts a batch of Dynmap radius renders covering a path through the waypoints."""
+    params = DynmapParameters(waypoints = waypoints, width = width, target = target)
     await self.run_dynmap_render(ctx, params)
 
   async def run_dynmap_render(self, ctx: commands.Context, params: DynmapParameters):
-    world = await self.config.render_world()
-    dimension = await self.config.render_dimension()
-    default_radius = await self.config.render_default_radius()
-    queue_size = await self.config.render_queue_size()
+    start_time_in_seconds = timer()
+
+    settings = await self.settings_cache.get()
+
+    default_radius = settings.render_default_radius
 
     this_render = None
 
@@ -145,576 +237,1014 @@ class Dynmap(DynmapConfig, DynmapEvents, commands.Cog):
     message = await ctx.send(embed = embed)
 
     try:
-      async with ClientSession() as session:
-        ws_socket, ws_token = await self.get_websocket_credentials(ctx, session)
-
-        async with session.ws_connect(ws_socket) as ws:
-          await self.authenticate_websocket(ctx, ws, ws_token)
-
-          # If a player name is specified, run "/data get entity" commands to get the current dimension and X,Z coordinates of the player.
-          if params.player is not None:
-
-            if ',' in params.player:
-              raise RenderFailedError('Player name must not contain commas.')
-            elif ' ' in params.player:
-              raise RenderFailedError('Player name must not contain spaces.')
-
-            player_dimension = await self.get_player_dimension(
-              ctx,
-              session,
-              ws,
-              message,
-              embed,
-              this_render,
-              params.player
-            )
-
-            if player_dimension != dimension:
-              raise RenderFailedError(f'Player `{params.player}` must be in world `{world}` to start the render.')
-
-            x, z = await self.get_player_coordinates(
-              ctx,
-              session,
-              ws,
-              message,
-              embed,
-              this_render,
-              params.player
-            )
-
-          # Otherwise, parse the provided X and Z parameters.
-          else:
-            if params.x is None:
-              raise RenderFailedError('The X coordinate must be specified.')
-            elif params.z is None:
-              raise RenderFailedError('The Z coordinate must be specified.')
-
-            x = params.x
-            z = params.z
-
-          radius = params.radius if params.radius is not None else default_radius
-
-          embed_url = await self.get_embed_url(ctx, x, z, world)
-          self.init_embed(ctx, embed, embed_url, x, z, radius)
-
-          if x > MAX_COORDINATE or x < -MAX_COORDINATE or z > MAX_COORDINATE or z < -MAX_COORDINATE:
-            raise RenderFailedError(f'X and Z coordinates must be between `-{MAX_COORDINATE}` and `{MAX_COORDINATE}`.')
-          if radius < MIN_RADIUS or radius > MAX_RADIUS:
-            raise RenderFailedError(f'Radius must be between `{MIN_RADIUS}` and `{MAX_RADIUS}`.')
-
-          this_render = {
-            'user_id': ctx.author.id,
-            'message_id': message.id,
-            'cancelling_user_id': None
-          }
-          async with self.config.render_queue() as render_queue:
-            if len(render_queue) >= queue_size:
-              raise RenderFailedError('Render queue is full. Please wait for a render to complete and try again.')
-            render_queue.append(this_render)
-
-          await self.start_dynmap_render(
-            ctx,
-            session,
-            ws,
-            message,
-            embed,
-            this_render,
-            x,
-            z,
-            radius)
+      # If a player name is specified, run "/data get entity" commands to get the current dimension and X,Z coordinates of the player.
+      if params.player is not None:
+
+        if ',' in params.player:
+          raise RenderFailedError('Player name must not contain commas.')
+        elif ' ' in params.player:
+          raise RenderFailedError('Player name must not contain spaces.')
 
-          elapsed_time_in_seconds = await self.dynmap_render_in_progress(
+        # Unless a target is specified, the target is picked from the player's dimension
+        with self.stats.measure(PHASE_PLAYER_LOOKUP):
+          settings, x, z = await self.get_player_target(
             ctx,
-            session,
-            ws,
+            settings,
             message,
             embed,
-            this_render)
-          elapsed_time_formatted = self.format_time(elapsed_time_in_seconds)
-
-          await self.update_status_message(message, embed,
-            title = 'Dynmap Render Complete',
-            color = Color.green(),
-            description = f'Time elapsed: {elapsed_time_formatted}',
-            reaction = self.UNICODE_WHITE_CHECK_MARK
+            this_render,
+            params.player,
+            params.target
           )
 
-    except RenderCancelledError as ex:
+      # Otherwise, use the provided X and Z coordinates, or the corners or waypoints of a batch render.
+      else:
+        settings = settings.for_target(params.target)
+
+        x = params.x
+        z = params.z
+
+      target = settings.render_target
+      world = settings.render_world
+      queue_size = settings.render_queue_size
+
+      # Staff renders skip ahead of other renders, and are not limited to a number of renders per user
+      # Authors outside of a server, like in direct messages, are never staff
+      is_staff = isinstance(ctx.author, Member) and await is_mod_or_superior(self.bot, ctx.author)
+
+      parts = []
+
+      if params.chunked:
+        if not is_staff:
+          raise RenderFailedError(f'Only staff can render a radius larger than `{MAX_RADIUS}`.')
+        parts = self.get_chunked_parts(x, z, params.radius)
+      elif params.corners is not None:
+        parts = self.get_rectangle_parts(params.corners, is_staff)
+      elif params.waypoints is not None:
+        parts = self.get_path_parts(params.waypoints, params.width, is_staff)
+
+      # A batch render runs its parts one after the other as a single queued render
+      if parts:
+        min_x = min(part.min_x for part in parts)
+        max_x = max(part.max_x for part in parts)
+        min_z = min(part.min_z for part in parts)
+        max_z = max(part.max_z for part in parts)
+
+        embed_url = self.get_embed_url(ctx, settings, (min_x + max_x) // 2, (min_z + max_z) // 2, world)
+        self.init_batch_embed(embed, embed_url, min_x, max_x, min_z, max_z, len(parts))
+
+        # Parts that were rendered recently are skipped, and if every part was, the area is not rendered again
+        if settings.render_freshness_window_in_seconds > 0:
+          since = time() - settings.render_freshness_window_in_seconds
+          rendered_ats = [self.render_history.get_covered_since(settings.pterodactyl_server_id, world, part, since) for part in parts]
+
+          if None not in rendered_ats:
+            await self.show_recently_rendered(message, embed, min(rendered_ats))
+            return
+
+          parts = [part for part, rendered_at in zip(parts, rendered_ats) if rendered_at is None]
+          embed.set_field_at(2, name = 'Parts', value = len(parts), inline = True)
+
+        area = parts[0]
+
+      else:
+        if x is None:
+          raise RenderFailedError('The X coordinate must be specified.')
+        elif z is None:
+          raise RenderFailedError('The Z coordinate must be specified.')
+
+        radius = params.radius if params.radius is not None else default_radius
+
+        embed_url = self.get_embed_url(ctx, settings, x, z, world)
+        self.init_embed(ctx, embed, embed_url, x, z, radius)
+
+        if x > MAX_COORDINATE or x < -MAX_COORDINATE or z > MAX_COORDINATE or z < -MAX_COORDINATE:
+          raise RenderFailedError(f'X and Z coordinates must be between `-{MAX_COORDINATE}` and `{MAX_COORDINATE}`.')
+        if radius < MIN_RADIUS or radius > MAX_RADIUS:
+          raise RenderFailedError(f'Radius must be between `{MIN_RADIUS}` and `{MAX_RADIUS}`.')
+
+        area = RenderArea(x, z, radius)
+
+        # If the whole area was rendered recently, link to the map instead of rendering the area again
+        if settings.render_freshness_window_in_seconds > 0:
+          rendered_at = self.render_history.get_covered_since(settings.pterodactyl_server_id, world, area, time() - settings.render_freshness_window_in_seconds)
+          if rendered_at is not None:
+            await self.show_recently_rendered(message, embed, rendered_at)
+            return
+
+        # A request that follows a render which is then cancelled looks for another render to follow, or is queued itself
+        while True:
+          # If a queued or running render already covers this area, follow that render instead of rendering the area again
+          covering_render = self.render_queue.find_covering(target, area)
+          if covering_render is not None:
+            if await self.follow_dynmap_render(ctx, settings, message, embed, covering_render, area):
+              return
+            continue
+
+          # If a render that has not started yet can be grown to cover this area as well, merge this request into it
+          mergeable_render = self.render_queue.find_mergeable(target, area, MAX_RADIUS)
+          if mergeable_render is not None:
+            self.render_queue.merge(mergeable_render, area)
+            mergeable_render.estimated_duration_in_seconds = self.render_history.estimate_duration(settings.pterodactyl_server_id, world, mergeable_render.area)
+            self.update_render_area(ctx, settings, mergeable_render)
+            if await self.follow_dynmap_render(ctx, settings, message, embed, mergeable_render, area):
+              return
+            continue
+
+          break
+
+      user_queue_limit = settings.render_user_queue_limit
+
+      if not is_staff and user_queue_limit > 0 and self.render_queue.count_user(target, ctx.author.id) >= user_queue_limit:
+        raise RenderFailedError(f'You can only have `{user_queue_limit}` renders queued at a time. Please wait for one of your renders to complete and try again.')
+
+      if self.render_queue.count(target) >= queue_size:
+        raise RenderFailedError('Render queue is full. Please wait for a render to complete and try again.')
+
+      this_render = RenderJob(
+        user_id = ctx.author.id,
+        message_id = message.id,
+        target = target,
+        priority = RenderPriority.STAFF if is_staff else RenderPriority.NORMAL,
+        world = world,
+        area = area,
+        estimated_duration_in_seconds = self.render_history.estimate_total_duration(settings.pterodactyl_server_id, world, parts or [area]),
+        parts = parts,
+        message = message,
+        embed = embed)
+      self.render_queue.add(this_render, settings.render_shortest_first)
+
+      # Leave the queue as soon as the in-game render has stopped, so that the next render of the target starts without
+      # waiting for this render's final status to be sent to Discord
+      try:
+        elapsed_time_in_seconds = await self.run_render_job(
+          ctx,
+          settings,
+          message,
+          embed,
+          this_render)
+      finally:
+        self.render_queue.remove(this_render.message_id)
+
+      elapsed_time_formatted = self.format_time(elapsed_time_in_seconds)
+
+      description = f'Time elapsed: {elapsed_time_formatted}{self.format_tiles_rendered(this_render.progress)}'
+      if parts:
+        description += f'\nParts rendered: {len(parts)}'
+
       await self.update_status_message(message, embed,
+        title = 'Dynmap Render Complete',
+        color = Color.green(),
+        description = description,
+        reaction = self.UNICODE_WHITE_CHECK_MARK,
+        final = True,
+        render = this_render
+      )
+
+      self.stats.record(PHASE_REQUEST, timer() - start_time_in_seconds)
+
+    except RenderCancelledError as ex:
+      self.stats.record_failure(PHASE_REQUEST, ex)
+      await self.show_final_error_status(ctx, message, embed, this_render,
         title = 'Dynmap Render Cancelled',
-        color = Color.red(),
-        description = f'{ex}',
-        reaction = self.UNICODE_X
+        description = f'{ex}'
       )
 
     except RenderFailedError as ex:
-      await self.update_status_message(message, embed,
+      self.stats.record_failure(PHASE_REQUEST, ex)
+      await self.show_final_error_status(ctx, message, embed, this_render,
         title = 'Dynmap Render Failed',
-        color = Color.red(),
-        description = f'Error: {ex}',
-        reaction = self.UNICODE_X
+        description = f'Error: {ex}'
       )
 
     except RenderTimeoutError as ex:
-      await self.update_status_message(message, embed,
+      self.stats.record_failure(PHASE_REQUEST, ex)
+      await self.show_final_error_status(ctx, message, embed, this_render,
         title = 'Dynmap Render Timeout',
-        color = Color.red(),
-        description = f'Error: {ex}',
-        reaction = self.UNICODE_X
+        description = f'Error: {ex}'
       )
 
     except HTTPException as ex:
+      self.stats.record_failure(PHASE_REQUEST, ex)
       await ctx.send('Error: Unable to edit render status message.')
 
     # Make sure to clear out the render from the queue if it stops for any reason
     finally:
       if this_render:
-        async with self.config.render_queue() as render_queue:
-          index, render = self.find_index_and_render_with_matching_message_id(render_queue, this_render['message_id'])
-          if index is not None:
-            render_queue.pop(index)
+        self.render_queue.remove(this_render.message_id)
+        this_render.finished.set()
+
+      self.status_messages.discard(message.id)
+
+      if settings.stats_prometheus_path:
+        await self.export_stats(settings.stats_prometheus_path)
 
-  async def get_embed_url(self,
+  # Shows that a render did not complete. These are shown from the error handlers of the render, so a status message
+  # that cannot be edited is reported in the channel instead of raising out of the command.
+  # The followers of a cancelled render do not share its status, since they request their own renders once it has finished.
+  async def show_final_error_status(self,
     ctx: commands.Context,
-    x: int,
-    z: int,
-    world: str) -> str:
+    message: Message,
+    embed: Embed,
+    this_render: RenderJob | None,
+    *,
+    title: str,
+    description: str) -> None:
 
-    web_host = await self.config.web_host()
-    web_map = await self.config.web_map()
-    web_zoom = await self.config.web_zoom()
-    web_y = await self.config.web_y()
+    if this_render is not None and this_render.cancelled.is_set():
+      this_render = None
 
-    if web_host is None:
-      raise RenderFailedError('Web host must be set in the config.')
+    try:
+      await self.update_status_message(message, embed,
+        title = title,
+        color = Color.red(),
+        description = description,
+        reaction = self.UNICODE_X,
+        final = True,
+        render = this_render
+      )
+    except HTTPException:
+      await ctx.send('Error: Unable to edit render status message.')
 
-    return f'{web_host}/?worldname={world}&mapname={web_map}&zoom={web_zoom}&x={x}&y={web_y}&z={z}'
+  # Runs a queued render until it has completed, and records each radius render in the render history.
+  # The parts of a batch render run back to back. The batch stays the running render of its target between parts, so
+  # each part starts as soon as the previous part has finished, without waiting for its turn again.
+  async def run_render_job(self,
+    ctx: commands.Context,
+    settings: DynmapSettings,
+    message: Message,
+    embed: Embed,
+    this_render: RenderJob) -> int:
+
+    world = settings.render_world
+
+    for part_index in range(max(len(this_render.parts), 1)):
+      if this_render.parts:
+        this_render.part_index = part_index
+        self.render_queue.set_area(this_render, this_render.parts[part_index])
+
+      await self.start_dynmap_render(
+        ctx,
+        settings,
+        message,
+        embed,
+        this_render)
+
+      elapsed_time_in_seconds = await self.dynmap_render_in_progress(
+        ctx,
+        settings,
+        message,
+        embed,
+        this_render)
+
+      tiles_rendered = this_render.progress.part_tiles_rendered
+
+      record = RenderRecord(
+        server_id = settings.pterodactyl_server_id,
+        world = world,
+        area = this_render.area,
+        finished_at = time(),
+        duration_in_seconds = elapsed_time_in_seconds,
+        tiles_rendered = tiles_rendered,
+        tiles_per_second = round(tiles_rendered / elapsed_time_in_seconds, 2) if tiles_rendered and elapsed_time_in_seconds > 0 else None)
+      self.render_history.add(record)
+      if record.tiles_per_second is not None:
+        self.stats.record_throughput(record.server_id, record.world, record.tiles_per_second)
+
+      this_render.completed_duration_in_seconds += elapsed_time_in_seconds
+
+    return this_render.completed_duration_in_seconds
+
+  async def show_recently_rendered(self,
+    message: Message,
+    embed: Embed,
+    rendered_at: float) -> None:
+
+    rendered_ago_formatted = self.format_time(time() - rendered_at)
+    await self.update_status_message(message, embed,
+      title = 'Dynmap Area Recently Rendered',
+      color = Color.green(),
+      description = f'This area was rendered {rendered_ago_formatted} ago. Click the title to view it on the map.',
+      reaction = self.UNICODE_WHITE_CHECK_MARK,
+      final = True
+    )
+
+  # Splits a large radius render into radius renders of at most the maximum radius, spiralling out from the centre so
+  # that the most relevant tiles are rendered first
+  def get_chunked_parts(self, x: int, z: int, radius: int) -> List[RenderArea]:
+    if x > MAX_COORDINATE or x < -MAX_COORDINATE or z > MAX_COORDINATE or z < -MAX_COORDINATE:
+      raise RenderFailedError(f'X and Z coordinates must be between `-{MAX_COORDINATE}` and `{MAX_COORDINATE}`.')
+    if radius < MIN_RADIUS or radius > MAX_LARGE_RADIUS:
+      raise RenderFailedError(f'Radius must be between `{MIN_RADIUS}` and `{MAX_LARGE_RADIUS}`.')
+
+    parts = cover_rectangle(x - radius, z - radius, x + radius, z + radius, MAX_RADIUS, MIN_RADIUS)
+    return self.check_batch_size(spiral_order(parts, x, z), True)
+
+  # Splits the rectangle between two corners into as few radius renders as a grid allows
+  def get_rectangle_parts(self, corners: Tuple[int, int, int, int], is_staff: bool) -> List[RenderArea]:
+    x1, z1, x2, z2 = corners
+
+    for coordinate in corners:
+      if coordinate > MAX_COORDINATE or coordinate < -MAX_COORDINATE:
+        raise RenderFailedError(f'X and Z coordinates must be between `-{MAX_COORDINATE}` and `{MAX_COORDINATE}`.')
+
+    parts = cover_rectangle(min(x1, x2), min(z1, z2), max(x1, x2), max(z1, z2), MAX_RADIUS, MIN_RADIUS)
+    return self.check_batch_size(parts, is_staff)
+
+  # Splits the blocks within the width of a path into radius renders, each covering as long a stretch of the path as it can
+  def get_path_parts(self, waypoints_text: str, width: int, is_staff: bool) -> List[RenderArea]:
+    width = width if width is not None else MIN_RADIUS
+    if width < 0 or width > MAX_PATH_WIDTH:
+      raise RenderFailedError(f'Path width must be between `0` and `{MAX_PATH_WIDTH}`.')
 
-  async def get_websocket_credentials(self,
+    waypoints = []
+    for waypoint_text in waypoints_text.replace(';', ' ').split():
+      waypoint_match = WAYPOINT_REGEX.fullmatch(waypoint_text)
+      if waypoint_match is None:
+        raise RenderFailedError(f'Waypoint `{waypoint_text}` must be written as `x,z`.')
+
+      x, z = int(waypoint_match.group('x')), int(waypoint_match.group('z'))
+      if x > MAX_COORDINATE or x < -MAX_COORDINATE or z > MAX_COORDINATE or z < -MAX_COORDINATE:
+        raise RenderFailedError(f'X and Z coordinates must be between `-{MAX_COORDINATE}` and `{MAX_COORDINATE}`.')
+      waypoints.append((x, z))
+
+    if not waypoints:
+      raise RenderFailedError('At least one waypoint must be specified.')
+
+    parts = cover_path(waypoints, width, MAX_RADIUS, MIN_RADIUS, MAX_BATCH_PARTS if is_staff else MAX_USER_BATCH_PARTS)
+    return self.check_batch_size(parts, is_staff)
+
+  # Staff can queue batches as large as render_large, while other users are limited to smaller batches
+  @staticmethod
+  def check_batch_size(parts: List[RenderArea], is_staff: bool) -> List[RenderArea]:
+    if len(parts) > MAX_BATCH_PARTS:
+      raise RenderFailedError(f'This area needs more than `{MAX_BATCH_PARTS}` radius renders. Please split it into smaller areas.')
+    if not is_staff and len(parts) > MAX_USER_BATCH_PARTS:
+      raise RenderFailedError(f'This area needs more than `{MAX_USER_BATCH_PARTS}` radius renders. Please split it into smaller areas, or ask a staff member to render it.')
+    return parts
+
+  async def export_stats(self, path: str) -> None:
+    try:
+      await to_thread(self.stats.write_prometheus, path)
+    except OSError as ex:
+      print(f'Unable to write Dynmap stats to {path}: {ex!r}', flush = True)
+
+  # Attaches a request to a queued or running render that covers its area.
+  # The request's status message mirrors the render's status until the render stops, or the request is cancelled.
+  # Returns True once the render has shown its final status on the request's message, or False if the render was
+  # cancelled and the request needs to be admitted again.
+  async def follow_dynmap_render(self,
     ctx: commands.Context,
-    session: ClientSession) -> Tuple[str, str]:
-
-    pterodactyl_host = await self.config.pterodactyl_api_host()
-    pterodactyl_key = await self.config.pterodactyl_api_key()
-    pterodactyl_id = await self.config.pterodactyl_server_id()
-
-    if pterodactyl_host is None:
-      raise RenderFailedError('Pterodactyl API host URL must be set in the config.')
-    elif pterodactyl_key is None:
-      raise RenderFailedError('Pterodactyl API client key must be set in the config.')
-    elif pterodactyl_id is None:
-      raise RenderFailedError('Pterodactyl API server ID must be set in the config.')
-
-    websocket_url = reduce(urljoin, [pterodactyl_host, 'api/client/servers/', pterodactyl_id + '/', 'websocket'])
-    headers = {
-      'Accept': 'application/json',
-      'Content-Type': 'application/json',
-      'Authorization': f'Bearer {pterodactyl_key}'
-    }
-    async with session.get(websocket_url, headers = headers) as response:
-      status_code = response.status
+    settings: DynmapSettings,
+    message: Message,
+    embed: Embed,
+    covering_render: RenderJob,
+    area: RenderArea) -> bool:
+
+    this_follower = RenderJob(
+      user_id = ctx.author.id,
+      message_id = message.id,
+      target = covering_render.target,
+      world = covering_render.world,
+      area = area,
+      message = message,
+      embed = embed)
+    self.render_queue.add_follower(covering_render, this_follower)
+
+    finished_task = create_task(covering_render.finished.wait())
+    cancelled_task = create_task(this_follower.cancelled.wait())
+
+    try:
+      included_in_index = len(embed.fields)
+      embed.add_field(name = 'Included In', value = covering_render.message.jump_url, inline = False)
+
+      await self.update_status_message(message, embed,
+        title = covering_render.embed.title,
+        color = covering_render.embed.color,
+        description = covering_render.embed.description,
+        footer = f'React with {self.UNICODE_STOP_BUTTON} to cancel (Initiating user or staff only).',
+        reaction = self.UNICODE_STOP_BUTTON
+      )
+
+      await wait([finished_task, cancelled_task], return_when = FIRST_COMPLETED)
+
+      if this_follower.cancelled.is_set():
+        cancelling_user_id = this_follower.cancelling_user_id
+
+        # A follower without a cancelling user was removed from the queue by an admin
+        if cancelling_user_id is None:
+          raise RenderFailedError('Render is missing from the render queue.')
+
+        cancelling_user = self.bot.get_user(cancelling_user_id)
+        if cancelling_user:
+          raise RenderCancelledError(f'Cancelled by {cancelling_user.mention}.')
+        else:
+          raise RenderFailedError('Cancelling user was not found.')
 
-      if status_code != 200:
-        raise RenderFailedError(f'Unable to get websocket credentials. Status code: `{status_code}`.')
+      # Cancelling the covering render only cancels the request of its own user
+      if covering_render.cancelled.is_set():
+        embed.remove_field(included_in_index)
+        return False
 
-      response_json = await response.json()
-      ws_socket = response_json['data']['socket']
-      ws_token = response_json['data']['token']
+      # The covering render has already shown its final status on this message
+      return True
 
-      return ws_socket, ws_token
+    finally:
+      finished_task.cancel()
+      cancelled_task.cancel()
+      self.render_queue.remove_follower(covering_render, this_follower)
 
-  async def authenticate_websocket(self,
+  # Shows the new area of a render that was grown to cover a merged request
+  def update_render_area(self,
     ctx: commands.Context,
-    ws: ClientWebSocketResponse,
-    ws_token: str) -> None:
+    settings: DynmapSettings,
+    render: RenderJob) -> None:
 
-    auth_timeout_in_seconds = await self.config.auth_timeout_in_seconds()
+    area = render.area
+    embed_url = self.get_embed_url(ctx, settings, area.x, area.z, render.world)
+    self.update_embed_area(render.embed, embed_url, area.x, area.z, area.radius)
 
-    request_json = {
-      'event': 'auth',
-      'args': [ws_token]
-    }
+    self.status_messages.get(render.message, render.embed).schedule()
 
-    await ws.send_json(request_json)
+  # Shows the interrupted status on the messages of renders that were queued or running when the bot last stopped
+  async def report_interrupted_renders(self, interrupted_messages: List[Tuple[int, int]]) -> None:
+    if not interrupted_messages:
+      return
 
-    start_time_in_seconds = timer()
+    await self.bot.wait_until_red_ready()
+
+    for channel_id, message_id in interrupted_messages:
+      try:
+        message = await self.bot.get_partial_messageable(channel_id).fetch_message(message_id)
+        embed = message.embeds[0] if message.embeds else Embed()
+
+        await self.update_status_message(message, embed,
+          title = 'Dynmap Render Interrupted',
+          color = Color.red(),
+          description = 'Error: The bot restarted before the render completed. Please try again.',
+          reaction = self.UNICODE_X,
+          final = True
+        )
+      except HTTPException as ex:
+        print(f'Unable to mark the status message {message_id} of an interrupted render: {ex!r}', flush = True)
+      finally:
+        self.status_messages.discard(message_id)
+
+  # Connects to the Pterodactyl server of every render target in the background, so that the first render does not wait
+  # for the websocket credentials, handshake and authentication
+  async def warm_connections(self) -> None:
+    settings = await self.settings_cache.get()
+    servers = [
+      server for server in settings.get_servers()
+      if server.pterodactyl_api_host and server.pterodactyl_api_key and server.pterodactyl_server_id
+    ]
+
+    results = await gather(*(self.get_connection(server).ensure_connected() for server in servers), return_exceptions = True)
+    for server, result in zip(servers, results):
+      if isinstance(result, Exception):
+        print(f'Unable to connect to Pterodactyl server {server.pterodactyl_server_id}: {result!r}', flush = True)
+
+  # Returns the connection to the Pterodactyl server of a render target, shared by all targets on that server
+  def get_connection(self, settings: DynmapSettings) -> PterodactylConnection:
+    server_id = settings.pterodactyl_server_id
+
+    connection = self.connections.get(server_id)
+    if connection is None:
+      connection = self.connections[server_id] = PterodactylConnection(self.settings_cache, server_id, self.stats)
+      player_cache = self.player_caches[server_id] = PlayerLocationCache()
+      connection.add_listener(player_cache.observe, ENTITY_DATA_KEYWORD)
+
+    return connection
+
+  # Returns the player locations seen on the console of the Pterodactyl server of a render target
+  def get_player_cache(self, settings: DynmapSettings) -> PlayerLocationCache:
+    self.get_connection(settings)
+    return self.player_caches[settings.pterodactyl_server_id]
+
+  def get_embed_url(self,
+    ctx: commands.Context,
+    settings: DynmapSettings,
+    x: int,
+    z: int,
+    world: str) -> str:
 
-    while timer() - start_time_in_seconds < auth_timeout_in_seconds:
-      event_json = await ws.receive_json()
+    web_host = settings.web_host
+    web_map = settings.web_map
+    web_zoom = settings.web_zoom
+    web_y = settings.web_y
 
-      if event_json['event'] == 'auth success':
-        return
+    if web_host is None:
+      raise RenderFailedError('Web host must be set in the config.')
 
-    raise RenderTimeoutError('Timed out while authenticating websocket.')
+    return f'{web_host}/?worldname={world}&mapname={web_map}&zoom={web_zoom}&x={x}&y={web_y}&z={z}'
 
-  async def get_player_dimension(self,
+  # Looks for the player on the server of the given target, or on the servers of all targets,
+  # and returns the settings of the target for the player's dimension with the player's X,Z coordinates.
+  async def get_player_target(self,
     ctx: commands.Context,
-    session: ClientSession,
-    ws: ClientWebSocketResponse,
+    settings: DynmapSettings,
     message: Message,
     embed: Embed,
-    this_render: dict,
-    player_name: str) -> str:
+    this_render: RenderJob,
+    player_name: str,
+    target_name: str) -> Tuple[DynmapSettings, int, int]:
 
-    command_timeout_in_seconds = await self.config.command_timeout_in_seconds()
+    if target_name is not None:
+      target_settings = settings.for_target(target_name)
 
-    dimension_command = f'data get entity {player_name} Dimension'
-    dimension_request_json = self.create_command_request_json(dimension_command)
+      player_dimension, x, z = await self.get_player_location(ctx, target_settings, message, embed, this_render, player_name)
+      if player_dimension != target_settings.render_dimension:
+        raise RenderFailedError(f'Player `{player_name}` must be in world `{target_settings.render_world}` to start the render.')
 
-    await ws.send_json(dimension_request_json)
+      return target_settings, x, z
 
-    success_response = self.CONSOLE_MESSAGE_ENTITY_DATA_RETURNED.format(player = player_name)
-    failure_response = self.CONSOLE_MESSAGE_NO_ENTITY_FOUND
-
-    dimension_result, dimension_output = await self.wait_for_console_response(
-      ctx,
-      session,
-      ws,
-      message,
-      embed,
-      this_render,
-      command_timeout_in_seconds,
-      success_response = success_response,
-      failure_response = failure_response
-    )
+    targets = list(settings.get_targets().values())
+    servers = settings.get_servers()
 
-    dimension_output = self.strip_ansi_control_sequences(dimension_output)
+    # Look for the player on every server at the same time, and stop the other lookups as soon as the player is found.
+    # A server that does not respond in time is treated like a server the player is not on.
+    lookup_tasks = {
+      create_task(self.get_player_location(ctx, server_settings, message, embed, this_render, player_name)): server_settings
+      for server_settings in servers
+    }
+    pending_tasks = set(lookup_tasks)
+    lookup_errors = []
+    try:
+      while pending_tasks:
+        done_tasks, pending_tasks = await wait(pending_tasks, return_when = FIRST_COMPLETED)
+        for lookup_task in done_tasks:
+          try:
+            player_dimension, x, z = lookup_task.result()
+          except (RenderFailedError, RenderTimeoutError) as ex:
+            lookup_errors.append(ex)
+            continue
+
+          server_settings = lookup_tasks[lookup_task]
+          for target_settings in targets:
+            if target_settings.pterodactyl_server_id == server_settings.pterodactyl_server_id and target_settings.render_dimension == player_dimension:
+              return target_settings, x, z
+
+          worlds = ', '.join(f'`{target_settings.render_world}`' for target_settings in targets)
+          raise RenderFailedError(f'Player `{player_name}` must be in one of the worlds {worlds} to start the render.')
+    finally:
+      for lookup_task in pending_tasks:
+        lookup_task.cancel()
+      await gather(*pending_tasks, return_exceptions = True)
 
-    if dimension_result == ConsoleResponseResult.SUCCESS:
-      regex = r'"minecraft:(?P<dimension>.+)"'
-      match = re.search(regex, dimension_output)
-      if match:
-        return match.group('dimension')
-      else:
-        raise RenderFailedError(f'Received an invalid response when retrieving current world for player `{player_name}`.')
-    elif dimension_result == ConsoleResponseResult.FAILURE:
-      raise RenderFailedError(f'Player `{player_name}` is currently not on the Minecraft server.')
-    else:
-      raise RenderTimeoutError(f'Did not receive a response when retrieving current world for player `{player_name}`.')
+    # The player was not found on any server. Only report a timeout if no server answered.
+    raise next((ex for ex in lookup_errors if isinstance(ex, RenderFailedError)), lookup_errors[0])
 
-  async def get_player_coordinates(self,
+  # Uses the player's location if it was seen on the console recently.
+  # Otherwise, sends the Dimension and Pos queries together, and waits for both responses at the same time.
+  async def get_player_location(self,
     ctx: commands.Context,
-    session: ClientSession,
-    ws: ClientWebSocketResponse,
+    settings: DynmapSettings,
     message: Message,
     embed: Embed,
-    this_render: dict,
-    player_name: str) -> Tuple[int, int]:
+    this_render: RenderJob,
+    player_name: str) -> Tuple[str, int, int]:
 
-    command_timeout_in_seconds = await self.config.command_timeout_in_seconds()
+    player_cache = self.get_player_cache(settings)
+    dimension = player_cache.get_dimension(player_name, settings.player_cache_ttl_in_seconds)
+    position = player_cache.get_position(player_name, settings.player_cache_ttl_in_seconds)
 
-    position_command = f'data get entity {player_name} Pos'
-    position_request_json = self.create_command_request_json(position_command)
+    lookups = {}
+    if dimension is None:
+      lookups['Dimension'] = self.get_player_entity_data(ctx, settings, message, embed, this_render, player_name, 'Dimension', ENTITY_DATA_DIMENSION_REGEX, 'current world')
+    if position is None:
+      lookups['Pos'] = self.get_player_entity_data(ctx, settings, message, embed, this_render, player_name, 'Pos', ENTITY_DATA_POSITION_REGEX, 'current coordinates')
 
-    await ws.send_json(position_request_json)
+    # If one lookup fails, stop the other, so that its waiter does not stay registered after the render has failed
+    lookup_tasks = [create_task(lookup) for lookup in lookups.values()]
+    try:
+      matches = dict(zip(lookups.keys(), await gather(*lookup_tasks)))
+    except BaseException:
+      for lookup_task in lookup_tasks:
+        lookup_task.cancel()
+      await gather(*lookup_tasks, return_exceptions = True)
+      raise
+
+    if 'Dimension' in matches:
+      dimension = matches['Dimension'].group('dimension')
+    if 'Pos' in matches:
+      position = int(float(matches['Pos'].group('x'))), int(float(matches['Pos'].group('z')))
+
+    x, z = position
+    return dimension, x, z
+
+  async def get_player_entity_data(self,
+    ctx: commands.Context,
+    settings: DynmapSettings,
+    message: Message,
+    embed: Embed,
+    this_render: RenderJob,
+    player_name: str,
+    path: str,
+    success_pattern: re.Pattern,
+    description: str) -> re.Match:
+
+    command_timeout_in_seconds = settings.command_timeout_in_seconds
+
+    command = f'data get entity {player_name} {path}'
 
     success_response = self.CONSOLE_MESSAGE_ENTITY_DATA_RETURNED.format(player = player_name)
     failure_response = self.CONSOLE_MESSAGE_NO_ENTITY_FOUND
 
-    position_result, position_output = await self.wait_for_console_response(
-      ctx,
-      session,
-      ws,
-      message,
-      embed,
-      this_render,
-      command_timeout_in_seconds,
-      success_response = success_response,
-      failure_response = failure_response
-    )
+    connection = self.get_connection(settings)
 
-    position_output = self.strip_ansi_control_sequences(position_output)
+    with connection.wait_for_console(success_response = success_response, failure_response = failure_response, success_pattern = success_pattern) as waiter:
+      await connection.send_command(command)
 
-    if position_result == ConsoleResponseResult.SUCCESS:
-      regex = r'\[(?P<x>-?\d+.\d+)d, (?P<y>-?\d+.\d+)d, (?P<z>-?\d+.\d+)d\]'
-      match = re.search(regex, position_output)
-      if match:
-        x = int(float(match.group('x')))
-        z = int(float(match.group('z')))
-        return x, z
-      else:
-        raise RenderFailedError(f'Received an invalid response when retrieving current coordinates for player `{player_name}`.')
-    elif position_result == ConsoleResponseResult.FAILURE:
+      result, output = await self.wait_for_console_response(
+        ctx,
+        settings,
+        message,
+        embed,
+        this_render,
+        waiter,
+        command_timeout_in_seconds
+      )
+
+    if result == ConsoleResponseResult.SUCCESS:
+      return success_pattern.search(output)
+    elif result == ConsoleResponseResult.FAILURE:
       raise RenderFailedError(f'Player `{player_name}` is currently not on the Minecraft server.')
     else:
-      raise RenderTimeoutError(f'Did not receive a response when retrieving current coordinates for player `{player_name}`.')
+      raise RenderTimeoutError(f'Did not receive a response when retrieving {description} for player `{player_name}`.')
 
   async def start_dynmap_render(self,
     ctx: commands.Context,
-    session: ClientSession,
-    ws: ClientWebSocketResponse,
+    settings: DynmapSettings,
     message: Message,
     embed: Embed,
-    this_render: dict,
-    x: int,
-    z: int,
-    radius: int) -> None:
+    this_render: RenderJob) -> None:
 
-    world = await self.config.render_world()
-    queued_render_start_delay_in_seconds = await self.config.queued_render_start_delay_in_seconds()
-    command_timeout_in_seconds = await self.config.command_timeout_in_seconds()
-    render_timeout_in_seconds = await self.config.render_timeout_in_seconds()
+    world = settings.render_world
+    command_timeout_in_seconds = settings.command_timeout_in_seconds
 
-    command = f'dynmap radiusrender {world} {x} {z} {radius}'
-    request_json = self.create_command_request_json(command)
+    connection = self.get_connection(settings)
 
-    while True:
-      start_render_result = ConsoleResponseResult.FAILURE
+    # The later parts of a batch render are already running
+    if not this_render.started:
+      queued_time_in_seconds = timer()
+      await self.wait_for_turn(ctx, settings, message, embed, this_render)
 
-      # Attempt to start the render only if it is the next queued render to run
-      async with self.config.render_queue() as render_queue:
-        if len(render_queue) > 0 and render_queue[0]['message_id'] == this_render['message_id']:
-          await ws.send_json(request_json)
+      self.render_queue.start(this_render)
+      self.stats.record(PHASE_QUEUE_WAIT, timer() - queued_time_in_seconds)
 
-          success_response = self.CONSOLE_MESSAGE_RENDER_STARTED.format(radius = radius, world = world)
-          failure_response = self.CONSOLE_MESSAGE_RENDER_ALREADY_RUNNING.format(world = world)
+    # Read the area only now, since other requests may have been merged into this render while it was queued
+    area = this_render.area
 
-          start_render_result, start_render_output = await self.wait_for_console_response(
-            ctx,
-            session,
-            ws,
-            message,
-            embed,
-            this_render,
-            command_timeout_in_seconds,
-            success_response = success_response,
-            failure_response = failure_response)
+    command = f'dynmap radiusrender {world} {area.x} {area.z} {area.radius}'
 
-      # If the render has started, return successfully
-      if start_render_result == ConsoleResponseResult.SUCCESS:
-        await self.update_status_message(message, embed,
-          title = 'Dynmap Render In Progress',
-          color = Color.gold(),
-          description = 'Time elapsed: 0m 0s',
-          footer = f'React with {self.UNICODE_STOP_BUTTON} to cancel (Initiating user or staff only).',
-          reaction = self.UNICODE_STOP_BUTTON
-        )
-        return
+    success_response = self.CONSOLE_MESSAGE_RENDER_STARTED.format(radius = area.radius, world = world)
+    failure_response = self.CONSOLE_MESSAGE_RENDER_ALREADY_RUNNING.format(world = world)
 
-      # If another render is already running...
-      elif start_render_result == ConsoleResponseResult.FAILURE:
+    with connection.wait_for_console(success_response = success_response, failure_response = failure_response) as waiter:
+      command_time_in_seconds = timer()
+      await connection.send_command(command)
 
-        # ...and the other render was initiated in-game and not through the bot, fail this render immediately
-        if render_queue[0]['message_id'] == this_render['message_id']:
-          raise RenderFailedError('An in-game render is currently running. Please try again in a few minutes.')
+      start_render_result, start_render_output = await self.wait_for_console_response(
+        ctx,
+        settings,
+        message,
+        embed,
+        this_render,
+        waiter,
+        command_timeout_in_seconds)
+
+    # If the render has started, return successfully
+    if start_render_result == ConsoleResponseResult.SUCCESS:
+      self.stats.record(PHASE_RENDER_START, timer() - command_time_in_seconds)
+
+      await self.update_status_message(message, embed,
+        title = 'Dynmap Render In Progress',
+        color = Color.gold(),
+        description = self.format_render_status(this_render, 0),
+        footer = f'React with {self.UNICODE_STOP_BUTTON} to cancel (Initiating user or staff only).',
+        reaction = self.UNICODE_STOP_BUTTON
+      )
+
+    # Renders started by the bot run one at a time per world, so a render that is already running was started in-game
+    elif start_render_result == ConsoleResponseResult.FAILURE:
+      raise RenderFailedError('An in-game render is currently running. Please try again in a few minutes.')
+
+    else:
+      raise RenderTimeoutError('Did not receive a response when starting the render.')
+
+  # Waits until the render is the next render of its target.
+  # The render queue wakes the next render as soon as the render ahead of it is removed, so a queued render neither
+  # reads the console nor polls, and starts without delay.
+  async def wait_for_turn(self,
+    ctx: commands.Context,
+    settings: DynmapSettings,
+    message: Message,
+    embed: Embed,
+    this_render: RenderJob) -> None:
+
+    cancelled_task = create_task(this_render.cancelled.wait())
+
+    try:
+      while not self.render_queue.is_next(this_render):
+        this_render.turn.clear()
+
+        # The renders ahead change whenever the render is woken, so the estimate is shown again every time
+        description = 'Another render is currently running. Please wait...'
+
+        estimated_start_in_seconds = self.estimate_start_time(this_render)
+        if estimated_start_in_seconds is not None:
+          description += f'\nEstimated start: ~{self.format_time(estimated_start_in_seconds)}'
 
-        # Otherwise, wait for the other render to finish or be cancelled, then try to start this render again
         await self.update_status_message(message, embed,
           title = 'Dynmap Render Queued',
           color = Color.blue(),
-          description = 'Another render is currently running. Please wait...',
+          description = description,
           footer = f'React with {self.UNICODE_STOP_BUTTON} to cancel (Initiating user or staff only).',
           reaction = self.UNICODE_STOP_BUTTON
         )
 
-        success_response = self.CONSOLE_MESSAGE_RENDER_FINISHED.format(world = world)
-        failure_response = self.CONSOLE_MESSAGE_RENDER_CANCELLED.format(world = world)
-
-        console_result, console_output = await self.wait_for_console_response(
-          ctx,
-          session,
-          ws,
-          message,
-          embed,
-          this_render,
-          render_timeout_in_seconds,
-          success_response = success_response,
-          failure_response = failure_response,
-          cancellable = True
-        )
-
-        if console_result == ConsoleResponseResult.TIMEOUT:
-          raise RenderTimeoutError('Waited too long for the current render to finish or be cancelled.')
+        turn_task = create_task(this_render.turn.wait())
+        try:
+          await wait([turn_task, cancelled_task], return_when = FIRST_COMPLETED)
+        finally:
+          turn_task.cancel()
 
-        # Wait a few seconds to let the previous render remove itself from the queue, then try to start the render again
-        await sleep(queued_render_start_delay_in_seconds)
+        if this_render.cancelled.is_set():
+          await self.stop_cancelled_render(ctx, settings, message, embed, this_render, run_command_when_cancelled = False)
 
-      else:
-        raise RenderTimeoutError('Did not receive a response when starting the render.')
+    finally:
+      cancelled_task.cancel()
 
   async def dynmap_render_in_progress(self,
     ctx: commands.Context,
-    session: ClientSession,
-    ws: ClientWebSocketResponse,
+    settings: DynmapSettings,
     message: Message,
     embed: Embed,
-    this_render: dict) -> int:
+    this_render: RenderJob) -> int:
 
-    world = await self.config.render_world()
+    world = settings.render_world
+    area = this_render.area
 
-    render_timeout_in_seconds = await self.config.render_timeout_in_seconds()
+    render_timeout_in_seconds = self.get_render_timeout(settings, area)
 
     success_response = self.CONSOLE_MESSAGE_RENDER_FINISHED.format(world = world)
 
     start_time_in_seconds = timer()
 
-    console_result, console_output = await self.wait_for_console_response(
-      ctx,
-      session,
-      ws,
-      message,
-      embed,
-      this_render,
-      render_timeout_in_seconds,
-      success_response = success_response,
-      show_elapsed_time = True,
-      cancellable = True,
-      run_command_when_cancelled = True
-    )
+    # Follow Dynmap's progress lines, to show the throughput and the estimated time remaining while waiting.
+    # A batch render keeps the same progress for all of its parts, so that it shows the progress of the whole batch.
+    if this_render.progress is None:
+      areas = this_render.parts or [area]
+      expected_tiles = [self.render_history.estimate_tiles(settings.pterodactyl_server_id, world, part) for part in areas]
+
+      this_render.progress = RenderProgress(
+        world,
+        sum(expected_tiles) if None not in expected_tiles else None,
+        self.render_history.estimate_total_duration(settings.pterodactyl_server_id, world, areas))
+
+    this_render.progress.start_part(self.render_history.estimate_total_duration(settings.pterodactyl_server_id, world, this_render.parts[this_render.part_index + 1:]))
+
+    connection = self.get_connection(settings)
+
+    # Dynmap keeps rendering if the websocket is lost, so the render is followed again once the websocket is reconnected
+    with connection.listen_to_console(this_render.progress.observe, RENDER_PROGRESS_KEYWORD), connection.wait_for_console(success_response = success_response, resumable = True) as waiter:
+      console_result, console_output = await self.wait_for_console_response(
+        ctx,
+        settings,
+        message,
+        embed,
+        this_render,
+        waiter,
+        render_timeout_in_seconds,
+        show_elapsed_time = True,
+        cancellable = True,
+        run_command_when_cancelled = True,
+        check_when_resumed = True
+      )
 
     if console_result == ConsoleResponseResult.SUCCESS:
+      self.stats.record(PHASE_RENDER, timer() - start_time_in_seconds)
+
       elapsed_time_in_seconds = int(timer() - start_time_in_seconds)
       return elapsed_time_in_seconds
 
+    # Dynmap only runs one radius render per world, so a render that is still running would make the next render fail
+    await self.cancel_timed_out_render(settings)
     raise RenderTimeoutError('Unable to verify that the dynmap render completed successfully.')
 
+  # Cancels the in-game render of a render that timed out. The render has failed either way, so errors are only logged.
+  async def cancel_timed_out_render(self, settings: DynmapSettings) -> None:
+    world = settings.render_world
+    connection = self.get_connection(settings)
+
+    try:
+      with connection.wait_for_console(success_response = self.CONSOLE_MESSAGE_RENDER_CANCELLED.format(world = world)) as waiter:
+        await connection.send_command(f'dynmap cancelrender {world}')
+        await wait_for(waiter.future, timeout = settings.command_timeout_in_seconds)
+    except Exception as ex:
+      print(f'Unable to cancel the timed out Dynmap render of world {world}: {ex!r}', flush = True)
+
+  # Renders are given a timeout from their estimated duration, so that a stuck render does not hold up the queue for the
+  # whole render timeout. An estimate from only a few renders can be far off, so it is not used until there are enough.
+  def get_render_timeout(self, settings: DynmapSettings, area: RenderArea) -> int:
+    server_id = settings.pterodactyl_server_id
+    world = settings.render_world
+    render_timeout_in_seconds = settings.render_timeout_in_seconds
+
+    if self.render_history.count_renders(server_id, world) < self.RENDER_TIMEOUT_MIN_SAMPLES:
+      return render_timeout_in_seconds
+
+    estimated_duration_in_seconds = self.render_history.estimate_duration(server_id, world, area)
+    if estimated_duration_in_seconds is None:
+      return render_timeout_in_seconds
+
+    estimated_timeout_in_seconds = int(estimated_duration_in_seconds * self.RENDER_TIMEOUT_ESTIMATE_FACTOR) + self.RENDER_TIMEOUT_GRACE_PERIOD_IN_SECONDS
+    return min(estimated_timeout_in_seconds, render_timeout_in_seconds)
+
+  # Estimates the number of seconds until a queued render starts, from the remaining time of the running render and the
+  # estimated durations of the renders ahead of it. Returns None if any of them has no estimate.
+  def estimate_start_time(self, this_render: RenderJob) -> float | None:
+    start_time_in_seconds = 0.0
+
+    for render in self.render_queue.get_ahead(this_render):
+      if render.progress is not None:
+        remaining_time_in_seconds = render.progress.get_remaining_time_in_seconds()
+      else:
+        remaining_time_in_seconds = render.estimated_duration_in_seconds
+
+      if remaining_time_in_seconds is None:
+        return None
+      start_time_in_seconds += remaining_time_in_seconds
+
+    return start_time_in_seconds
+
+  # Stops a render that was cancelled, by raising the error that describes who cancelled it
+  async def stop_cancelled_render(self,
+    ctx: commands.Context,
+    settings: DynmapSettings,
+    message: Message,
+    embed: Embed,
+    this_render: RenderJob,
+    run_command_when_cancelled: bool) -> None:
+
+    cancelling_user_id = this_render.cancelling_user_id
+
+    # A render without a cancelling user was removed from the queue by an admin
+    if cancelling_user_id is None:
+      raise RenderFailedError('Render is missing from the render queue.')
+
+    cancelling_user = self.bot.get_user(cancelling_user_id)
+    if cancelling_user:
+      await self.cancel_dynmap_render(
+        ctx,
+        settings,
+        message,
+        embed,
+        this_render,
+        cancelling_user,
+        run_command_when_cancelled)
+    else:
+      raise RenderFailedError('Cancelling user was not found.')
+
   async def cancel_dynmap_render(self,
     ctx: commands.Context,
-    session: ClientSession,
-    ws: ClientWebSocketResponse,
+    settings: DynmapSettings,
     message: Message,
     embed: Embed,
-    this_render: dict,
+    this_render: RenderJob,
     cancelling_user: User,
     run_command_when_cancelled: bool) -> None:
 
     cancel_render_result = ConsoleResponseResult.SUCCESS
 
     if run_command_when_cancelled:
-      world = await self.config.render_world()
-      command_timeout_in_seconds = await self.config.command_timeout_in_seconds()
+      world = settings.render_world
+      command_timeout_in_seconds = settings.command_timeout_in_seconds
 
       command = f'dynmap cancelrender {world}'
-      request_json = self.create_command_request_json(command)
-
-      await ws.send_json(request_json)
 
       success_response = self.CONSOLE_MESSAGE_RENDER_CANCELLED.format(world = world)
 
-      cancel_render_result, cancel_render_output = await self.wait_for_console_response(
-        ctx,
-        session,
-        ws,
-        message,
-        embed,
-        this_render,
-        command_timeout_in_seconds,
-        success_response = success_response)
+      connection = self.get_connection(settings)
+
+      with connection.wait_for_console(success_response = success_response) as waiter:
+        await connection.send_command(command)
+
+        cancel_render_result, cancel_render_output = await self.wait_for_console_response(
+          ctx,
+          settings,
+          message,
+          embed,
+          this_render,
+          waiter,
+          command_timeout_in_seconds)
 
     if cancel_render_result == ConsoleResponseResult.SUCCESS:
       raise RenderCancelledError(f'Cancelled by {cancelling_user.mention}.')
     else:
       raise RenderTimeoutError('Did not receive a response when cancelling the render.')
 
+  # Waits for the connection's reader to hand a matching console line to the waiter.
+  # The waiter must be registered before the command is sent, so that the response cannot be missed.
   async def wait_for_console_response(self,
     ctx: commands.Context,
-    session: ClientSession,
-    ws: ClientWebSocketResponse,
+    settings: DynmapSettings,
     message: Message,
     embed: Embed,
-    this_render: dict,
+    this_render: RenderJob,
+    waiter: ConsoleWaiter,
     timeout_in_seconds: int,
     *,
-    success_response: str = None,            # If a received console message contains this text, return a "SUCCESS" result.
-    failure_response: str = None,            # If a received console message contains this text, return a "FAILURE" result.
-    show_elapsed_time: bool = False,         # Set to True to show the elapsed time in the description while waiting for a response
-    cancellable: bool = False,               # Set to True if the render can be cancelled
-    run_command_when_cancelled: bool = False # Set to True if the "/dynmap cancelrender" command should be run when the render is cancelled
+    show_elapsed_time: bool = False,          # Set to True to show the elapsed time in the description while waiting for a response
+    cancellable: bool = False,                # Set to True if the render can be cancelled
+    run_command_when_cancelled: bool = False, # Set to True if the "/dynmap cancelrender" command should be run when the render is cancelled
+    check_when_resumed: bool = False          # Set to True to treat the render as finished if it is no longer running after the websocket was reconnected
     ) -> Tuple[ConsoleResponseResult, str]:
 
-    elapsed_time_interval_in_seconds = await self.config.elapsed_time_interval_in_seconds()
-    cancellation_check_interval_in_seconds = await self.config.cancellation_check_interval_in_seconds()
+    elapsed_time_interval_in_seconds = settings.elapsed_time_interval_in_seconds
 
+    # Each wait is bounded by whichever comes first: the overall deadline, the next elapsed time update, or a cancellation.
+    # Elapsed time updates are scheduled from the start time, so they keep a steady cadence regardless of console traffic.
     start_time_in_seconds = timer()
-    current_time_in_seconds = start_time_in_seconds
-    last_elapsed_time_update_in_seconds = start_time_in_seconds
-    last_cancellation_check_in_seconds = start_time_in_seconds
+    deadline_in_seconds = start_time_in_seconds + timeout_in_seconds
+    next_elapsed_time_update_in_seconds = start_time_in_seconds + elapsed_time_interval_in_seconds if show_elapsed_time else deadline_in_seconds
 
-    while current_time_in_seconds - start_time_in_seconds < timeout_in_seconds:
-      event_json = await ws.receive_json()
-      console_output = await self.handle_websocket_event(
-        ctx,
-        session,
-        ws,
-        event_json)
-
-      current_time_in_seconds = timer()
-      elapsed_time_in_seconds = int(current_time_in_seconds - start_time_in_seconds)
-
-      if console_output:
-        if success_response and success_response.casefold() in console_output.casefold():
-          return ConsoleResponseResult.SUCCESS, console_output
-
-        if failure_response and failure_response.casefold() in console_output.casefold():
-          return ConsoleResponseResult.FAILURE, console_output
-
-      # If elapsed time is shown, update it in the description every 5 seconds
-      if show_elapsed_time:
-        if current_time_in_seconds - last_elapsed_time_update_in_seconds >= elapsed_time_interval_in_seconds:
-          elapsed_time_in_seconds = int(elapsed_time_in_seconds / elapsed_time_interval_in_seconds) * elapsed_time_interval_in_seconds
-          elapsed_time_formatted = self.format_time(elapsed_time_in_seconds)
-          embed.description = f'Time elapsed: {elapsed_time_formatted}'
-          await message.edit(embed = embed)
-
-          last_elapsed_time_update_in_seconds = current_time_in_seconds
-
-      # If this render can be cancelled, check for render cancellations every second
-      if cancellable:
-        if current_time_in_seconds - last_cancellation_check_in_seconds >= cancellation_check_interval_in_seconds:
-          async with self.config.render_queue() as render_queue:
-            index, render = self.find_index_and_render_with_matching_message_id(render_queue, this_render['message_id'])
-            if render:
-              cancelling_user_id = render['cancelling_user_id']
-              if cancelling_user_id:
-                cancelling_user = self.bot.get_user(cancelling_user_id)
-                if cancelling_user:
-                  await self.cancel_dynmap_render(
-                    ctx,
-                    session,
-                    ws,
-                    message,
-                    embed,
-                    this_render,
-                    cancelling_user,
-                    run_command_when_cancelled)
-                else:
-                  raise RenderFailedError('Cancelling user was not found.')
-
-              last_cancellation_check_in_seconds = current_time_in_seconds
-
-            else:
-              raise RenderFailedError('Render is missing from the render queue.')
-
-    return ConsoleResponseResult.TIMEOUT, None
-
-  # Processes incoming events from the Pterodactyl API websocket.
-  # Ensures that the websocket token is re-authenticated when it is expiring or expired.
-  # If the event is 'console output', return the output. Otherwise, return None.
-  async def handle_websocket_event(self,
-    ctx: commands.Context,
-    session: ClientSession,
-    ws: ClientWebSocketResponse,
-    event_json: str) -> str | None:
+    wait_futures = [waiter.future]
+    cancelled_task = None
+    if cancellable:
+      cancelled_task = create_task(this_render.cancelled.wait())
+      wait_futures.append(cancelled_task)
 
-    event = event_json['event']
+    resumed_task = None
+    if check_when_resumed:
+      resumed_task = create_task(waiter.resumed.wait())
+      wait_futures.append(resumed_task)
 
-    if event == 'console output':
-      arg = event_json['args'][0]
-      return arg
+    try:
+      while True:
+        current_time_in_seconds = timer()
+        if current_time_in_seconds >= deadline_in_seconds:
+          return ConsoleResponseResult.TIMEOUT, None
 
-    elif event == 'jwt error':
-      arg = event_json['args'][0]
-      if arg == 'jwt: exp claim is invalid':
-        raise RenderFailedError('Websocket token expired.')
-      else:
-        print(f'JWT Error: {arg}', flush = True)
-        raise RenderFailedError('Websocket failure. Check your console or logs for details.')
+        wake_time_in_seconds = min(deadline_in_seconds, next_elapsed_time_update_in_seconds)
+        await wait(wait_futures, timeout = wake_time_in_seconds - current_time_in_seconds, return_when = FIRST_COMPLETED)
+
+        # Raises if the websocket failed while waiting
+        if waiter.future.done():
+          return waiter.future.result()
+
+        if cancellable and this_render.cancelled.is_set():
+          await self.stop_cancelled_render(ctx, settings, message, embed, this_render, run_command_when_cancelled)
+
+        # The finish line may have been written while the websocket was being reconnected, in which case Dynmap no longer
+        # lists the render as running. Otherwise, keep waiting for the finish line.
+        if resumed_task is not None and resumed_task.done():
+          waiter.resumed.clear()
+
+          if await self.is_render_active(settings) is False and not waiter.future.done():
+            return ConsoleResponseResult.SUCCESS, None
+
+          wait_futures.remove(resumed_task)
+          resumed_task = create_task(waiter.resumed.wait())
+          wait_futures.append(resumed_task)
+
+        current_time_in_seconds = timer()
 
-    elif event == 'token expiring' or event == 'token expired':
-      ws_socket, ws_token = await self.get_websocket_credentials(ctx, session)
-      await self.authenticate_websocket(ctx, ws, ws_token)
+        # If elapsed time is shown, update it in the description every few seconds.
+        # The edit is sent in the background, so that a slow Discord edit cannot delay the deadline.
+        if show_elapsed_time and current_time_in_seconds >= next_elapsed_time_update_in_seconds:
+          elapsed_intervals = int((current_time_in_seconds - start_time_in_seconds) / elapsed_time_interval_in_seconds)
+          next_elapsed_time_update_in_seconds = start_time_in_seconds + (elapsed_intervals + 1) * elapsed_time_interval_in_seconds
 
-    return None
+          self.update_status_description(message, embed, self.format_render_status(this_render, elapsed_intervals * elapsed_time_interval_in_seconds))
+
+    finally:
+      if cancelled_task is not None:
+        cancelled_task.cancel()
+      if resumed_task is not None:
+        resumed_task.cancel()
+
+  # Asks Dynmap whether a radius render of the target's world is running.
+  # Returns None if Dynmap did not answer in time, or the command could not be sent.
+  async def is_render_active(self, settings: DynmapSettings) -> bool | None:
+    connection = self.get_connection(settings)
+
+    try:
+      with connection.wait_for_console(success_response = self.CONSOLE_MESSAGE_ACTIVE_RENDER_JOBS) as waiter:
+        await connection.send_command('dynmap stats')
+        console_result, console_output = await wait_for(waiter.future, timeout = settings.command_timeout_in_seconds)
+    except TimeoutError:
+      return None
+    except Exception as ex:
+      print(f'Unable to check whether the Dynmap render is running: {ex!r}', flush = True)
+      return None
+
+    active_render_jobs_match = ACTIVE_RENDER_JOBS_REGEX.search(console_output)
+    if active_render_jobs_match is None:
+      return None
+
+    active_worlds = re.split(r'[\s,]+', active_render_jobs_match.group('worlds').casefold())
+    return settings.render_world.casefold() in active_worlds
 
   async def update_status_message(self,
     message: Message,
@@ -724,19 +1254,51 @@ class Dynmap(DynmapConfig, DynmapEvents, commands.Cog):
     color: Color = None,
     description: str = None,
     footer: str = None,
-    reaction: str = None) -> None:
+    reaction: str = None,
+    final: bool = False,     # Set to True to wait until the status has been sent
+    render: RenderJob = None # The render of the message, for its followers once it may have left the queue
+    ) -> None:
 
     embed.title = title
     embed.color = color
     embed.description = description
     embed.set_footer(text = footer)
 
-    await message.edit(embed = embed)
+    # The status is sent in the background, coalesced with any other updates to the message that are not sent yet
+    status_message = self.status_messages.get(message, embed)
+    status_message.update(reaction)
+
+    # Requests that follow this render show the same status. A follower's message failing to update must not fail this render.
+    render = render or self.render_queue.get(message.id)
+    if render:
+      await gather(*(
+        self.update_status_message(follower.message, follower.embed,
+          title = title,
+          color = color,
+          description = description,
+          footer = footer,
+          reaction = reaction,
+          final = final
+        )
+        for follower in list(render.followers)
+      ), return_exceptions = True)
+
+    if final:
+      await status_message.flush()
+
+  def update_status_description(self,
+    message: Message,
+    embed: Embed,
+    description: str) -> None:
+
+    embed.description = description
 
-    await message.clear_reactions()
+    self.status_messages.get(message, embed).schedule()
 
-    if reaction:
-      await message.add_reaction(reaction)
+    render = self.render_queue.get(message.id)
+    if render:
+      for follower in render.followers:
+        self.update_status_description(follower.message, follower.embed, description)
 
   @staticmethod
   def create_embed(ctx) -> Embed:
@@ -760,22 +1322,57 @@ class Dynmap(DynmapConfig, DynmapEvents, commands.Cog):
     return embed
 
   @staticmethod
-  def create_command_request_json(command: str) -> object:
-    return {
-      'event': 'send command',
-      'args': [command]
-    }
+  def init_batch_embed(embed: Embed, url: str, min_x: int, max_x: int, min_z: int, max_z: int, part_count: int) -> Embed:
+    embed.url = url
+
+    embed.add_field(name = 'X', value = f'{min_x} to {max_x}', inline = True)
+    embed.add_field(name = 'Z', value = f'{min_z} to {max_z}', inline = True)
+    embed.add_field(name = 'Parts', value = part_count, inline = True)
+
+    return embed
 
   @staticmethod
-  def format_time(time_in_seconds: int) -> str:
-    format_minutes = int(time_in_seconds / 60)
-    format_seconds = int(time_in_seconds % 60)
-    return f'{format_minutes}m {format_seconds}s'
+  def update_embed_area(embed: Embed, url: str, x: int, z: int, radius: int) -> Embed:
+    embed.url = url
+
+    embed.set_field_at(0, name = 'X', value = x, inline = True)
+    embed.set_field_at(1, name = 'Z', value = z, inline = True)
+    embed.set_field_at(2, name = 'Radius', value = radius, inline = True)
+
+    return embed
+
+  # Describes a running render, given the time elapsed in its current radius render
+  @classmethod
+  def format_render_status(cls, render: RenderJob, elapsed_time_in_seconds: int) -> str:
+    description = f'Time elapsed: {cls.format_time(render.completed_duration_in_seconds + elapsed_time_in_seconds)}'
+    if render.parts:
+      description = f'Part {render.part_index + 1} of {len(render.parts)}\n{description}'
+
+    return description + cls.format_progress(render.progress)
+
+  @classmethod
+  def format_progress(cls, progress: RenderProgress | None) -> str:
+    if progress is None:
+      return ''
+
+    description = cls.format_tiles_rendered(progress)
+
+    remaining_time_in_seconds = progress.get_remaining_time_in_seconds()
+    if remaining_time_in_seconds is not None:
+      description += f'\nTime remaining: ~{cls.format_time(remaining_time_in_seconds)}'
+
+    return description
 
   @staticmethod
-  def find_index_and_render_with_matching_message_id(render_queue, message_id) -> Tuple[int, object]:
-    return next(((i, v) for (i, v) in enumerate(render_queue) if v['message_id'] == message_id), (None, None))
+  def format_tiles_rendered(progress: RenderProgress | None) -> str:
+    if progress is None or progress.tiles_rendered == 0:
+      return ''
+
+    tiles_per_second = progress.get_tiles_per_second()
+    return f'\nTiles rendered: {progress.tiles_rendered} ({tiles_per_second:.1f} tiles/s)'
 
   @staticmethod
-  def strip_ansi_control_sequences(s: str) -> str:
-    return re.sub(r'(\x9B|\x1B\[)[0-?]*[ -\/]*[@-~]', '', s)
\ No newline at end of file
+  def format_time(time_in_seconds: int) -> str:
+    format_minutes = int(time_in_seconds / 60)
+    format_seconds = int(time_in_seconds % 60)
+    return f'{format_minutes}m {format_seconds}s'
@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Tuple
+
+@dataclass
+class DynmapParameters:
+  player: str = None
+  x: int = None
+  z: int = None
+  radius: int = None
+  target: str = None
+  corners: Tuple[int, int, int, int] = None # X and Z coordinates of two opposite corners of a batch render
+  waypoints: str = None                     # Waypoints of a batch render along a path, as "x,z x,z ..."
+  width: int = None                         # Blocks to render on each side of the path
+  chunked: bool = False                     # Split a radius larger than the maximum radius into a batch render
+
+class ConsoleResponseResult(Enum):
+  SUCCESS = 1
+  FAILURE = 2
+  TIMEOUT = 3
+
+class RenderCancelledError(Exception):
+  pass
+
+class RenderFailedError(Exception):
+  pass
+
+class RenderTimeoutError(Exception):
+  pass
\ No newline at end of file
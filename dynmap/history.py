@@ -0,0 +1,177 @@
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from redbot.core import Config
+from typing import Dict, List, Tuple
+
+from .persistence import WriteBehind
+from .prediction import DurationModel
+from .spatial import GridIndex, RenderArea, is_area_covered
+
+# Renders are told apart by Pterodactyl server and world, since servers usually share the same world names
+HistoryKey = Tuple[str, str] # (Pterodactyl server ID, world)
+
+@dataclass(frozen = True)
+class RenderRecord:
+  server_id: str
+  world: str
+  area: RenderArea
+  finished_at: float # Unix time
+  duration_in_seconds: int
+  tiles_rendered: int = None
+  tiles_per_second: float = None
+
+  def to_json(self) -> dict:
+    return {
+      'server_id': self.server_id,
+      'world': self.world,
+      'x': self.area.x,
+      'z': self.area.z,
+      'radius': self.area.radius,
+      'finished_at': self.finished_at,
+      'duration_in_seconds': self.duration_in_seconds,
+      'tiles_rendered': self.tiles_rendered,
+      'tiles_per_second': self.tiles_per_second
+    }
+
+  @classmethod
+  def from_json(cls, record_json: dict) -> 'RenderRecord':
+    # Records written before renders were told apart by server have no server ID, and match no server
+    return cls(
+      server_id = record_json.get('server_id'),
+      world = record_json['world'],
+      area = RenderArea(record_json['x'], record_json['z'], record_json['radius']),
+      finished_at = record_json['finished_at'],
+      duration_in_seconds = record_json['duration_in_seconds'],
+      tiles_rendered = record_json.get('tiles_rendered'),
+      tiles_per_second = record_json.get('tiles_per_second'))
+
+  @property
+  def key(self) -> HistoryKey:
+    return (self.server_id, self.world)
+
+# History of the most recent completed renders, indexed per server and world by area, so that requests for an area that was
+# rendered recently can be answered without rendering it again, and so that the duration of new renders can be predicted.
+# Like the render queue, the in-memory history is the source of truth, and is written to the config in the background.
+class RenderHistory:
+  MAX_RECORDS = 1000
+
+  # Bounds of the adjustment to a predicted duration, from how much longer or shorter previous renders of the same area took
+  MIN_LOCAL_FACTOR = 0.5
+  MAX_LOCAL_FACTOR = 2.0
+
+  def __init__(self, config: Config):
+    self.config = config
+
+    # Records by key, from oldest to newest
+    self.records: OrderedDict[int, RenderRecord] = OrderedDict()
+    self.areas: Dict[HistoryKey, GridIndex[int]] = defaultdict(GridIndex)
+    self.next_key = 0
+
+    # Total tiles rendered and blocks covered per server and world, by the records whose tile count is known
+    self.tile_totals: Dict[HistoryKey, List[int]] = defaultdict(lambda: [0, 0])
+
+    # Duration per server and world, against the number of blocks rendered
+    self.duration_models: Dict[HistoryKey, DurationModel] = defaultdict(DurationModel)
+
+    self.persistence = WriteBehind(config.render_history, lambda: [record.to_json() for record in self.records.values()])
+
+  def __len__(self) -> int:
+    return len(self.records)
+
+  async def load(self) -> None:
+    self.records.clear()
+    self.areas.clear()
+    self.tile_totals.clear()
+    self.duration_models.clear()
+
+    for record_json in await self.config.render_history():
+      self.append(RenderRecord.from_json(record_json))
+
+  def add(self, record: RenderRecord) -> None:
+    self.append(record)
+    self.persistence.schedule()
+
+  def append(self, record: RenderRecord) -> None:
+    key = self.next_key
+    self.next_key += 1
+
+    self.records[key] = record
+    self.areas[record.key].insert(key, record.area)
+    self.add_tile_totals(record, 1)
+    self.duration_models[record.key].add(record.area.block_count, record.duration_in_seconds)
+
+    # Drop the oldest records
+    while len(self.records) > self.MAX_RECORDS:
+      oldest_key, oldest_record = self.records.popitem(last = False)
+      self.areas[oldest_record.key].remove(oldest_key)
+      self.add_tile_totals(oldest_record, -1)
+      self.duration_models[oldest_record.key].remove(oldest_record.area.block_count, oldest_record.duration_in_seconds)
+
+  def add_tile_totals(self, record: RenderRecord, sign: int) -> None:
+    if record.tiles_rendered:
+      tile_totals = self.tile_totals[record.key]
+      tile_totals[0] += sign * record.tiles_rendered
+      tile_totals[1] += sign * record.area.block_count
+
+  # Estimates the number of tiles a render of the area will update, from the tiles per block of previous renders
+  def estimate_tiles(self, server_id: str, world: str, area: RenderArea) -> int | None:
+    tiles, blocks = self.tile_totals.get((server_id, world), (0, 0))
+    if tiles <= 0 or blocks <= 0:
+      return None
+
+    return round(tiles / blocks * area.block_count)
+
+  # Returns the number of renders of the world that durations are predicted from
+  def count_renders(self, server_id: str, world: str) -> int:
+    duration_model = self.duration_models.get((server_id, world))
+    return duration_model.count if duration_model is not None else 0
+
+  # Predicts the duration of a render of the area from the size of previous renders of the world.
+  # Some parts of a world take longer to render than others, so the prediction is scaled by how much longer or shorter
+  # than predicted the previous renders overlapping the area took.
+  def estimate_duration(self, server_id: str, world: str, area: RenderArea) -> float | None:
+    duration_model = self.duration_models.get((server_id, world))
+    if duration_model is None:
+      return None
+
+    estimated_duration_in_seconds = duration_model.predict(area.block_count)
+    if estimated_duration_in_seconds is None:
+      return None
+
+    actual_total = 0
+    predicted_total = 0.0
+    for key in self.areas[(server_id, world)].query(area):
+      record = self.records[key]
+      actual_total += record.duration_in_seconds
+      predicted_total += duration_model.predict(record.area.block_count)
+
+    if actual_total > 0 and predicted_total > 0:
+      local_factor = min(max(actual_total / predicted_total, self.MIN_LOCAL_FACTOR), self.MAX_LOCAL_FACTOR)
+      estimated_duration_in_seconds *= local_factor
+
+    return estimated_duration_in_seconds
+
+  # Sums the predicted durations of renders of the areas, or returns None if any of them cannot be predicted
+  def estimate_total_duration(self, server_id: str, world: str, areas: List[RenderArea]) -> float | None:
+    total_duration_in_seconds = 0.0
+    for area in areas:
+      estimated_duration_in_seconds = self.estimate_duration(server_id, world, area)
+      if estimated_duration_in_seconds is None:
+        return None
+      total_duration_in_seconds += estimated_duration_in_seconds
+
+    return total_duration_in_seconds
+
+  # If renders finished since the given time cover the whole area, returns the finish time of the oldest of them.
+  # Otherwise, returns None.
+  def get_covered_since(self, server_id: str, world: str, area: RenderArea, since: float) -> float | None:
+    records = [self.records[key] for key in self.areas[(server_id, world)].query(area)]
+    records = [record for record in records if record.finished_at >= since]
+
+    if not is_area_covered(area, [record.area for record in records]):
+      return None
+
+    return min(record.finished_at for record in records)
+
+  async def flush(self) -> None:
+    await self.persistence.flush()
\ No newline at end of file
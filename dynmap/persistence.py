@@ -0,0 +1,29 @@
+from asyncio import Task, create_task
+from redbot.core.config import Value
+from typing import Any, Callable
+
+# Writes a config value in the background whenever it changes, so that the in-memory state stays the source of truth
+# and callers never wait for the config. Changes made while a write is in progress are coalesced into a single
+# follow-up write of the latest state.
+class WriteBehind:
+  def __init__(self, value: Value, serialize: Callable[[], Any]):
+    self.value = value
+    self.serialize = serialize
+
+    self.task: Task = None
+    self.pending = False
+
+  def schedule(self) -> None:
+    self.pending = True
+    if self.task is None or self.task.done():
+      self.task = create_task(self.write())
+
+  async def write(self) -> None:
+    while self.pending:
+      self.pending = False
+      await self.value.set(self.serialize())
+
+  # Waits until the latest state has been written
+  async def flush(self) -> None:
+    if self.task is not None:
+      await self.task
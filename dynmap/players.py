@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from timeit import default_timer as timer
+from typing import Dict, Tuple
+
+import re
+
+# Responses to "/data get entity <player> Dimension" and "/data get entity <player> Pos".
+# Both start with the same text, and are told apart by the shape of their payload.
+ENTITY_DATA_DIMENSION_REGEX = re.compile(r'has the following entity data: "minecraft:(?P<dimension>[^"]+)"')
+ENTITY_DATA_POSITION_REGEX = re.compile(r'has the following entity data: \[(?P<x>-?\d+.\d+)d, (?P<y>-?\d+.\d+)d, (?P<z>-?\d+.\d+)d\]')
+
+# Any entity data response, including full NBT output from "/data get entity <player>" run by an admin.
+# Only lines containing the keyword are passed to the cache.
+ENTITY_DATA_KEYWORD = 'has the following entity data:'
+ENTITY_DATA_REGEX = re.compile(r'(?P<player>\w+) has the following entity data: (?P<data>.*)$')
+NBT_DIMENSION_REGEX = re.compile(r'Dimension: "minecraft:(?P<dimension>[^"]+)"')
+NBT_POSITION_REGEX = re.compile(r'Pos: \[(?P<x>-?\d+.\d+)d, (?P<y>-?\d+.\d+)d, (?P<z>-?\d+.\d+)d\]')
+
+@dataclass
+class PlayerLocation:
+  dimension: str = None
+  dimension_time: float = None
+  position: Tuple[int, int] = None
+  position_time: float = None
+
+# Short-lived cache of player dimensions and X,Z coordinates, filled from every entity data response that passes
+# through the console, whether it was requested by this cog or by someone else.
+class PlayerLocationCache:
+  def __init__(self):
+    self.locations: Dict[str, PlayerLocation] = {}
+
+  def get_dimension(self, player_name: str, ttl_in_seconds: int) -> str | None:
+    location = self.locations.get(player_name.casefold())
+    if location is not None and self.is_fresh(location.dimension_time, ttl_in_seconds):
+      return location.dimension
+    return None
+
+  def get_position(self, player_name: str, ttl_in_seconds: int) -> Tuple[int, int] | None:
+    location = self.locations.get(player_name.casefold())
+    if location is not None and self.is_fresh(location.position_time, ttl_in_seconds):
+      return location.position
+    return None
+
+  # Console listener
+  def observe(self, line: str) -> None:
+    entity_data_match = ENTITY_DATA_REGEX.search(line)
+    if entity_data_match is None:
+      return
+
+    data = entity_data_match.group('data')
+    location = self.locations.setdefault(entity_data_match.group('player').casefold(), PlayerLocation())
+    current_time = timer()
+
+    dimension_match = ENTITY_DATA_DIMENSION_REGEX.search(line) or NBT_DIMENSION_REGEX.search(data)
+    if dimension_match:
+      location.dimension = dimension_match.group('dimension')
+      location.dimension_time = current_time
+
+    position_match = ENTITY_DATA_POSITION_REGEX.search(line) or NBT_POSITION_REGEX.search(data)
+    if position_match:
+      location.position = (int(float(position_match.group('x'))), int(float(position_match.group('z'))))
+      location.position_time = current_time
+
+  @staticmethod
+  def is_fresh(time: float, ttl_in_seconds: int) -> bool:
+    return time is not None and timer() - time < ttl_in_seconds
\ No newline at end of file
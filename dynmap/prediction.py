@@ -0,0 +1,39 @@
+# Least squares fit of render duration against the number of blocks in the render area, for one world.
+# The fit is kept as running sums, so that renders can be added to and removed from it in constant time. Durations and
+# block counts are whole numbers, so the sums are exact and removing a render undoes adding it.
+class DurationModel:
+  # Number of renders needed before the fitted line is used, instead of the average time per block
+  MIN_FIT_SAMPLES = 3
+
+  def __init__(self):
+    self.count = 0
+    self.sum_blocks = 0
+    self.sum_duration = 0
+    self.sum_blocks_squared = 0
+    self.sum_blocks_duration = 0
+
+  def add(self, block_count: int, duration_in_seconds: int, sign: int = 1) -> None:
+    self.count += sign
+    self.sum_blocks += sign * block_count
+    self.sum_duration += sign * duration_in_seconds
+    self.sum_blocks_squared += sign * block_count * block_count
+    self.sum_blocks_duration += sign * block_count * duration_in_seconds
+
+  def remove(self, block_count: int, duration_in_seconds: int) -> None:
+    self.add(block_count, duration_in_seconds, -1)
+
+  # Predicts the duration of a render of the given number of blocks, or None if there are no renders to predict from
+  def predict(self, block_count: int) -> float | None:
+    if self.count <= 0 or self.sum_blocks <= 0:
+      return None
+
+    # Renders usually share the default radius, in which case there is no line to fit, and the average time per block is used instead.
+    # A line sloping downwards is just as unusable.
+    denominator = self.count * self.sum_blocks_squared - self.sum_blocks * self.sum_blocks
+    if self.count >= self.MIN_FIT_SAMPLES and denominator > 0:
+      slope = (self.count * self.sum_blocks_duration - self.sum_blocks * self.sum_duration) / denominator
+      if slope > 0:
+        intercept = (self.sum_duration - slope * self.sum_blocks) / self.count
+        return max(intercept + slope * block_count, 0.0)
+
+    return self.sum_duration / self.sum_blocks * block_count
@@ -0,0 +1,83 @@
+from timeit import default_timer as timer
+from typing import Dict
+
+import re
+
+# Progress lines written by Dynmap while a radius render is running, for example:
+# Radius render of map 'flat' of 'new' in progress - 500 tiles rendered (45.12 msec/map-tile, 12.30 msec per render)
+# Each map of the world reports its own count, and some versions of Dynmap append the percentage complete.
+# Only lines containing the keyword are passed to the tracker.
+RENDER_PROGRESS_KEYWORD = 'radius render of map'
+RENDER_PROGRESS_REGEX = re.compile(r"radius render of map '(?P<map>[^']*)' of '(?P<world>[^']*)' (?:in progress|completed) - (?P<tiles>\d+) tiles rendered", re.IGNORECASE)
+RENDER_PERCENT_REGEX = re.compile(r'(?P<percent>\d+(?:\.\d+)?)%')
+
+# Tracks the progress of a running radius render from the progress lines on the console.
+class RenderProgress:
+  def __init__(self, world: str, expected_tiles: int = None, expected_duration_in_seconds: float = None):
+    self.world = world.casefold()
+    self.expected_tiles = expected_tiles
+    self.expected_duration_in_seconds = expected_duration_in_seconds
+
+    self.tiles_by_map: Dict[str, int] = {}
+    self.percent: float = None
+    self.start_time = timer()
+
+    # A batch render runs several radius renders, which each report their own tile counts and percentage
+    self.completed_tiles = 0
+    self.part_start_time = self.start_time
+    self.later_parts_duration_in_seconds: float = 0.0
+
+  @property
+  def tiles_rendered(self) -> int:
+    return self.completed_tiles + self.part_tiles_rendered
+
+  @property
+  def part_tiles_rendered(self) -> int:
+    return sum(self.tiles_by_map.values())
+
+  # Starts following the next radius render of a batch render, given the estimated duration of the renders after it, if known
+  def start_part(self, later_parts_duration_in_seconds: float | None = 0.0) -> None:
+    self.completed_tiles += self.part_tiles_rendered
+    self.tiles_by_map.clear()
+    self.percent = None
+    self.part_start_time = timer()
+    self.later_parts_duration_in_seconds = later_parts_duration_in_seconds
+
+  # Console listener
+  def observe(self, line: str) -> None:
+    progress_match = RENDER_PROGRESS_REGEX.search(line)
+    if progress_match is None or progress_match.group('world').casefold() != self.world:
+      return
+
+    self.tiles_by_map[progress_match.group('map')] = int(progress_match.group('tiles'))
+
+    percent_match = RENDER_PERCENT_REGEX.search(line, progress_match.end())
+    if percent_match:
+      self.percent = float(percent_match.group('percent'))
+
+  def get_tiles_per_second(self) -> float | None:
+    elapsed_time_in_seconds = timer() - self.start_time
+    tiles_rendered = self.tiles_rendered
+
+    if tiles_rendered == 0 or elapsed_time_in_seconds <= 0:
+      return None
+
+    return tiles_rendered / elapsed_time_in_seconds
+
+  # Prefers the percentage reported by Dynmap for the current radius render, then extrapolates the current throughput to
+  # the expected tile count, and otherwise falls back to the expected duration, until the render runs longer than expected.
+  def get_remaining_time_in_seconds(self) -> float | None:
+    elapsed_time_in_seconds = timer() - self.start_time
+
+    if self.percent is not None and 0 < self.percent < 100 and self.later_parts_duration_in_seconds is not None:
+      part_elapsed_time_in_seconds = timer() - self.part_start_time
+      return part_elapsed_time_in_seconds * (100 - self.percent) / self.percent + self.later_parts_duration_in_seconds
+
+    tiles_per_second = self.get_tiles_per_second()
+    if self.expected_tiles and tiles_per_second:
+      return max(self.expected_tiles - self.tiles_rendered, 0) / tiles_per_second
+
+    if self.expected_duration_in_seconds is not None and elapsed_time_in_seconds < self.expected_duration_in_seconds:
+      return self.expected_duration_in_seconds - elapsed_time_in_seconds
+
+    return None
\ No newline at end of file
@@ -0,0 +1,232 @@
+from asyncio import Event
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from discord import Embed, Message
+from redbot.core import Config
+from typing import Dict, List, Tuple
+
+from .persistence import WriteBehind
+from .progress import RenderProgress
+from .scheduling import FairQueue, RenderPriority
+from .spatial import GridIndex, RenderArea
+
+@dataclass
+class RenderJob:
+  user_id: int
+  message_id: int
+  target: str = None
+  priority: RenderPriority = RenderPriority.NORMAL
+  world: str = None
+  area: RenderArea = None
+  cancelling_user_id: int = None
+
+  # Predicted from previous renders of the world, if there are any
+  estimated_duration_in_seconds: float = None
+
+  # Areas of a batch render, which runs one radius render per area, back to back. Empty for a single radius render.
+  # The area of a batch render is the area of its current part.
+  parts: List[RenderArea] = field(default_factory = list, repr = False)
+  part_index: int = 0
+
+  # Seconds taken by the parts of a batch render that have completed
+  completed_duration_in_seconds: int = 0
+
+  # Set just before the radius render command is sent. The area of a started render can no longer change.
+  started: bool = False
+
+  # Set when the render is cancelled by a user, or removed from the queue by an admin.
+  # Waits on the render's console responses are interrupted as soon as this is set.
+  cancelled: Event = field(default_factory = Event, repr = False, compare = False)
+
+  # Set when the render has stopped for any reason, after its final status has been shown
+  finished: Event = field(default_factory = Event, repr = False, compare = False)
+
+  # Set when the render may have become the next render of its target, to wake it while it waits for its turn
+  turn: Event = field(default_factory = Event, repr = False, compare = False)
+
+  # Requests whose area is covered by this render. Their status messages mirror this render's status message.
+  followers: List['RenderJob'] = field(default_factory = list, repr = False, compare = False)
+
+  # Set while the render is running
+  progress: RenderProgress = field(default = None, repr = False, compare = False)
+
+  message: Message = field(default = None, repr = False, compare = False)
+  embed: Embed = field(default = None, repr = False, compare = False)
+
+  def cancel(self, cancelling_user_id: int = None) -> None:
+    if not self.cancelled.is_set():
+      self.cancelling_user_id = cancelling_user_id
+      self.cancelled.set()
+
+  @property
+  def channel_id(self) -> int | None:
+    return self.message.channel.id if self.message is not None else None
+
+  def to_json(self) -> dict:
+    return {
+      'user_id': self.user_id,
+      'message_id': self.message_id,
+      'channel_id': self.channel_id,
+      'target': self.target,
+      'priority': self.priority.name,
+      'world': self.world,
+      'x': self.area.x if self.area else None,
+      'z': self.area.z if self.area else None,
+      'radius': self.area.radius if self.area else None,
+      'cancelling_user_id': self.cancelling_user_id,
+      'parts': [{ 'x': part.x, 'z': part.z, 'radius': part.radius } for part in self.parts],
+      'part_index': self.part_index,
+      'followers': [{ 'message_id': follower.message_id, 'channel_id': follower.channel_id } for follower in self.followers]
+    }
+
+# Queues of renders started by the bot, one per render target, each including its currently running render.
+# Dynmap only runs one radius render per world at a time, so each target runs its renders independently of the others.
+# The order in which the renders of a target run is decided by the target's fair queue.
+# The in-memory queue is the source of truth. It is indexed by message ID, and is written to the config in the
+# background only when renders are added or removed, so that lookups and cancellation checks never touch the config.
+# The areas of queued and running renders are also indexed per target, so that new requests for an area that is
+# already being rendered can follow the existing render instead of rendering the same area again.
+class RenderQueue:
+  def __init__(self, config: Config):
+    self.config = config
+
+    self.jobs: OrderedDict[int, RenderJob] = OrderedDict()
+    self.queues: Dict[str, FairQueue] = defaultdict(FairQueue)
+    self.followers: Dict[int, RenderJob] = {}
+    self.areas: Dict[str, GridIndex[int]] = defaultdict(GridIndex)
+
+    self.persistence = WriteBehind(config.render_queue, lambda: [job.to_json() for job in self.jobs.values()])
+
+  def __len__(self) -> int:
+    return len(self.jobs)
+
+  # Returns the number of queued renders of a target, including its running render
+  def count(self, target: str) -> int:
+    queue = self.queues.get(target)
+    return len(queue) if queue is not None else 0
+
+  # Returns the number of queued renders of a user for a target, including a running render
+  def count_user(self, target: str, user_id: int) -> int:
+    queue = self.queues.get(target)
+    return queue.count_user(user_id) if queue is not None else 0
+
+  # Returns the queued render or the follower with the given status message
+  def get(self, message_id: int) -> RenderJob | None:
+    return self.jobs.get(message_id) or self.followers.get(message_id)
+
+  def is_next(self, job: RenderJob) -> bool:
+    queue = self.queues.get(job.target)
+    return queue is not None and queue.peek() is job
+
+  # Marks the next render of a target as running. Call just before sending the radius render command.
+  def start(self, job: RenderJob) -> None:
+    self.queues[job.target].start(job)
+    job.started = True
+
+  # Returns the renders of the job's target that run before it, including the running render
+  def get_ahead(self, job: RenderJob) -> List[RenderJob]:
+    queue = self.queues.get(job.target)
+    return queue.get_ahead(job) if queue is not None else []
+
+  def add(self, job: RenderJob, shortest_first: bool = False) -> None:
+    self.jobs[job.message_id] = job
+    self.queues[job.target].push(job, shortest_first)
+    if job.area is not None:
+      self.areas[job.target].insert(job.message_id, job.area)
+    self.persistence.schedule()
+
+  def remove(self, message_id: int) -> None:
+    job = self.jobs.pop(message_id, None)
+    if job is not None:
+      queue = self.queues[job.target]
+      queue.remove(job)
+      if not queue:
+        del self.queues[job.target]
+      else:
+        self.wake_next(job.target)
+
+      if job.area is not None:
+        self.areas[job.target].remove(message_id)
+      self.persistence.schedule()
+
+  # Wakes the render that runs next on a target, in case it is waiting for its turn
+  def wake_next(self, target: str) -> None:
+    queue = self.queues.get(target)
+    next_job = queue.peek() if queue is not None else None
+    if next_job is not None:
+      next_job.turn.set()
+
+  def clear(self) -> None:
+    for job in self.jobs.values():
+      job.cancel()
+    for follower in self.followers.values():
+      follower.cancel()
+
+    self.jobs.clear()
+    self.queues.clear()
+    self.followers.clear()
+    self.areas.clear()
+    self.persistence.schedule()
+
+  # Returns a render that will render the whole area, if there is one
+  def find_covering(self, target: str, area: RenderArea) -> RenderJob | None:
+    for message_id in self.areas[target].query(area):
+      job = self.jobs[message_id]
+      if job.area.contains(area) and not job.cancelled.is_set():
+        return job
+    return None
+
+  # Moves a batch render on to the area of its next part
+  def set_area(self, job: RenderJob, area: RenderArea) -> None:
+    job.area = area
+    self.areas[job.target].insert(job.message_id, area)
+    self.persistence.schedule()
+
+  # Returns the single render that has not started yet, and grows the least when its area is extended to cover the given area
+  def find_mergeable(self, target: str, area: RenderArea, max_radius: int) -> RenderJob | None:
+    best_job = None
+    best_radius = None
+
+    for message_id in self.areas[target].query(area):
+      job = self.jobs[message_id]
+      if job.started or job.cancelled.is_set() or job.parts:
+        continue
+
+      radius = job.area.union(area).radius
+      if radius <= max_radius and (best_radius is None or radius < best_radius):
+        best_job = job
+        best_radius = radius
+
+    return best_job
+
+  # Grows a render that has not started yet, so that it also covers the given area.
+  # The render keeps its place in the queue, even if it is ordered by estimated duration.
+  def merge(self, job: RenderJob, area: RenderArea) -> None:
+    job.area = job.area.union(area)
+    self.areas[job.target].insert(job.message_id, job.area)
+    self.persistence.schedule()
+
+  def add_follower(self, job: RenderJob, follower: RenderJob) -> None:
+    job.followers.append(follower)
+    self.followers[follower.message_id] = follower
+    self.persistence.schedule()
+
+  def remove_follower(self, job: RenderJob, follower: RenderJob) -> None:
+    if follower in job.followers:
+      job.followers.remove(follower)
+    if self.followers.pop(follower.message_id, None) is not None:
+      self.persistence.schedule()
+
+  # Returns the status messages of the renders and followers in the stored queue, as (channel ID, message ID).
+  # Call before the queue is first changed, to find the renders that were interrupted when the bot last stopped.
+  async def load_interrupted(self) -> List[Tuple[int, int]]:
+    status_messages = []
+    for job_json in await self.config.render_queue():
+      for status_json in [job_json] + job_json.get('followers', []):
+        # Status messages stored without their channel cannot be found again
+        if isinstance(status_json, dict) and status_json.get('channel_id') is not None:
+          status_messages.append((status_json['channel_id'], status_json['message_id']))
+    return status_messages
+
+  async def flush(self) -> None:
+    await self.persistence.flush()
\ No newline at end of file
@@ -0,0 +1,102 @@
+from collections import defaultdict
+from enum import IntEnum
+from heapq import heappop, heappush
+from itertools import count
+from timeit import default_timer as timer
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+  from .render_queue import RenderJob
+
+class RenderPriority(IntEnum):
+  STAFF = 0
+  NORMAL = 1
+
+# Orders the renders waiting for a render target, and tracks the render that is running on it.
+# Waiting renders are ordered by priority, then by round, then by arrival. Each user's renders are placed in
+# consecutive rounds, so users take turns instead of one user's renders running back to back ahead of everyone else's.
+# Within a round, renders can instead be ordered shortest first, by their arrival time plus their estimated duration.
+# Short renders then overtake long ones, which lowers the average wait, but a long render is only overtaken by renders
+# that arrive less than its estimated duration after it, so it cannot wait forever.
+# Renders are kept in a heap, and removed renders are skipped when they reach the top, so adding, removing and
+# starting renders all take O(log n) time.
+class FairQueue:
+  def __init__(self):
+    # Entries of (priority, round, order, sequence, message ID). May contain entries of removed renders.
+    self.heap: List[Tuple[int, int, float, int, int]] = []
+    self.entries: Dict[int, Tuple[int, int, float, int, int]] = {}
+    self.waiting: Dict[int, 'RenderJob'] = {}
+    self.running: 'RenderJob' = None
+
+    self.user_counts: Dict[int, int] = defaultdict(int)
+    self.user_rounds: Dict[int, int] = {}
+    self.current_round = 0
+    self.sequence = count()
+
+  def __len__(self) -> int:
+    return len(self.waiting) + (self.running is not None)
+
+  # Returns the number of waiting and running renders of a user
+  def count_user(self, user_id: int) -> int:
+    return self.user_counts.get(user_id, 0)
+
+  def push(self, job: 'RenderJob', shortest_first: bool = False) -> None:
+    # A user's first render joins the current round, and each further render waits for the next round after the previous one
+    last_round = self.user_rounds.get(job.user_id)
+    job_round = self.current_round if last_round is None else max(self.current_round, last_round + 1)
+    self.user_rounds[job.user_id] = job_round
+
+    order = timer()
+    if shortest_first and job.estimated_duration_in_seconds is not None:
+      order += job.estimated_duration_in_seconds
+
+    entry = (job.priority, job_round, order, next(self.sequence), job.message_id)
+    heappush(self.heap, entry)
+    self.entries[job.message_id] = entry
+    self.waiting[job.message_id] = job
+    self.user_counts[job.user_id] += 1
+
+  # Returns the running render, or the render that runs next if none is running
+  def peek(self) -> 'RenderJob | None':
+    if self.running is not None:
+      return self.running
+
+    while self.heap and self.heap[0][-1] not in self.waiting:
+      heappop(self.heap)
+
+    return self.waiting[self.heap[0][-1]] if self.heap else None
+
+  # Returns the running render and the waiting renders that run before the given render, in no particular order
+  def get_ahead(self, job: 'RenderJob') -> List['RenderJob']:
+    ahead = [self.running] if self.running is not None and self.running is not job else []
+
+    entry = self.entries.get(job.message_id)
+    if entry is not None:
+      ahead += [self.waiting[message_id] for message_id, other_entry in self.entries.items() if other_entry < entry]
+
+    return ahead
+
+  # Moves the next render from the waiting renders to the running render
+  def start(self, job: 'RenderJob') -> None:
+    if self.running is job or self.peek() is not job:
+      return
+
+    _, job_round, _, _, _ = heappop(self.heap)
+    del self.waiting[job.message_id]
+    del self.entries[job.message_id]
+
+    self.running = job
+    self.current_round = max(self.current_round, job_round)
+
+  def remove(self, job: 'RenderJob') -> None:
+    if self.running is job:
+      self.running = None
+    elif self.waiting.pop(job.message_id, None) is not None:
+      del self.entries[job.message_id]
+    else:
+      return
+
+    self.user_counts[job.user_id] -= 1
+    if self.user_counts[job.user_id] <= 0:
+      del self.user_counts[job.user_id]
+      self.user_rounds.pop(job.user_id, None)
\ No newline at end of file
@@ -0,0 +1,97 @@
+from dataclasses import dataclass, fields, replace
+from redbot.core import Config
+from typing import Dict, List
+
+from .helpers import RenderFailedError
+
+# Immutable snapshot of the Dynmap settings, loaded once and passed down through a render,
+# so that a render does not read the config backend repeatedly and sees a consistent view of the settings.
+@dataclass(frozen = True)
+class DynmapSettings:
+  pterodactyl_api_host: str
+  pterodactyl_api_key: str
+  pterodactyl_server_id: str
+  render_world: str
+  render_dimension: str
+  render_default_radius: int
+  render_queue_size: int
+  web_host: str
+  web_map: str
+  web_zoom: int
+  web_y: int
+  elapsed_time_interval_in_seconds: int
+  auth_timeout_in_seconds: int
+  command_timeout_in_seconds: int
+  render_timeout_in_seconds: int
+  player_cache_ttl_in_seconds: int
+  render_freshness_window_in_seconds: int
+  render_user_queue_limit: int
+  render_shortest_first: bool
+  stats_prometheus_path: str
+  render_targets: dict
+
+  # Name of the render target that these settings are for, if any. Not stored in the config.
+  render_target: str = None
+
+  @classmethod
+  async def load(cls, config: Config) -> 'DynmapSettings':
+    all_settings = await config.all()
+    return cls(**{ field.name: all_settings[field.name] for field in fields(cls) if field.name in all_settings })
+
+  # Returns the settings of every render target, by name.
+  # The global world, dimension and server form the default target, named after the world. Each configured target
+  # replaces them with its own, and may also override the queue size and timeouts.
+  def get_targets(self) -> Dict[str, 'DynmapSettings']:
+    targets = { self.render_world: replace(self, render_target = self.render_world) }
+
+    for name, target in self.render_targets.items():
+      targets[name] = replace(self,
+        render_target = name,
+        pterodactyl_server_id = target.get('server_id') or self.pterodactyl_server_id,
+        render_world = target['world'],
+        render_dimension = target['dimension'],
+        render_queue_size = target.get('queue_size') or self.render_queue_size,
+        command_timeout_in_seconds = target.get('command_timeout_in_seconds') or self.command_timeout_in_seconds,
+        render_timeout_in_seconds = target.get('render_timeout_in_seconds') or self.render_timeout_in_seconds)
+
+    return targets
+
+  # Returns the settings of the given render target, or of the default target
+  def for_target(self, name: str = None) -> 'DynmapSettings':
+    targets = self.get_targets()
+
+    if name is None:
+      return targets[self.render_world]
+    elif name not in targets:
+      raise RenderFailedError(f'Render target `{name}` does not exist.')
+
+    return targets[name]
+
+  # Returns the settings of the first target of each Pterodactyl server, starting with the default target's server
+  def get_servers(self) -> List['DynmapSettings']:
+    servers = {}
+    for target in self.get_targets().values():
+      servers.setdefault(target.pterodactyl_server_id, target)
+    return list(servers.values())
+
+# Caches the settings snapshot until the settings are changed by a config command.
+class DynmapSettingsCache:
+  def __init__(self, config: Config):
+    self.config = config
+
+    self.settings: DynmapSettings = None
+    self.version = 0
+
+  async def get(self) -> DynmapSettings:
+    # If the settings are invalidated while loading, load them again so that the change is not lost
+    while self.settings is None:
+      version = self.version
+      settings = await DynmapSettings.load(self.config)
+      if version == self.version:
+        self.settings = settings
+
+    return self.settings
+
+  def invalidate(self) -> None:
+    self.settings = None
+    self.version += 1
\ No newline at end of file
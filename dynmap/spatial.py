@@ -0,0 +1,208 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from math import atan2, ceil
+from typing import Dict, Generic, Hashable, Iterable, Iterator, List, Set, Tuple, TypeVar
+
+K = TypeVar('K', bound = Hashable)
+
+# The square of blocks covered by a Dynmap radius render.
+@dataclass(frozen = True)
+class RenderArea:
+  x: int
+  z: int
+  radius: int
+
+  @property
+  def min_x(self) -> int:
+    return self.x - self.radius
+
+  @property
+  def max_x(self) -> int:
+    return self.x + self.radius
+
+  @property
+  def min_z(self) -> int:
+    return self.z - self.radius
+
+  @property
+  def max_z(self) -> int:
+    return self.z + self.radius
+
+  @property
+  def block_count(self) -> int:
+    return (2 * self.radius + 1) ** 2
+
+  def contains(self, other: 'RenderArea') -> bool:
+    return (self.min_x <= other.min_x and other.max_x <= self.max_x
+      and self.min_z <= other.min_z and other.max_z <= self.max_z)
+
+  def overlaps(self, other: 'RenderArea') -> bool:
+    return (self.min_x <= other.max_x and other.min_x <= self.max_x
+      and self.min_z <= other.max_z and other.min_z <= self.max_z)
+
+  # The smallest square that contains both areas
+  def union(self, other: 'RenderArea') -> 'RenderArea':
+    min_x = min(self.min_x, other.min_x)
+    max_x = max(self.max_x, other.max_x)
+    min_z = min(self.min_z, other.min_z)
+    max_z = max(self.max_z, other.max_z)
+
+    x = (min_x + max_x) // 2
+    z = (min_z + max_z) // 2
+    radius = max(x - min_x, max_x - x, z - min_z, max_z - z)
+
+    return RenderArea(x, z, radius)
+
+# Buckets areas into a uniform grid of cells, so that finding the areas near a given area
+# only looks at the cells it overlaps, instead of every area in the index.
+class GridIndex(Generic[K]):
+  DEFAULT_CELL_SIZE = 512
+
+  def __init__(self, cell_size: int = DEFAULT_CELL_SIZE):
+    self.cell_size = cell_size
+
+    self.cells: Dict[Tuple[int, int], Set[K]] = defaultdict(set)
+    self.areas: Dict[K, RenderArea] = {}
+
+  def __len__(self) -> int:
+    return len(self.areas)
+
+  def __contains__(self, key: K) -> bool:
+    return key in self.areas
+
+  def get(self, key: K) -> RenderArea | None:
+    return self.areas.get(key)
+
+  def insert(self, key: K, area: RenderArea) -> None:
+    self.remove(key)
+
+    self.areas[key] = area
+    for cell in self.get_cells(area):
+      self.cells[cell].add(key)
+
+  def remove(self, key: K) -> None:
+    area = self.areas.pop(key, None)
+    if area is None:
+      return
+
+    for cell in self.get_cells(area):
+      keys = self.cells[cell]
+      keys.discard(key)
+      if not keys:
+        del self.cells[cell]
+
+  # Returns the keys of all areas that overlap the given area
+  def query(self, area: RenderArea) -> Set[K]:
+    candidates = set()
+    for cell in self.get_cells(area):
+      candidates.update(self.cells.get(cell, ()))
+
+    return { key for key in candidates if self.areas[key].overlaps(area) }
+
+  def get_cells(self, area: RenderArea) -> Iterator[Tuple[int, int]]:
+    for cell_x in range(area.min_x // self.cell_size, area.max_x // self.cell_size + 1):
+      for cell_z in range(area.min_z // self.cell_size, area.max_z // self.cell_size + 1):
+        yield cell_x, cell_z
+# Returns True if every block of the area is inside at least one of the covering areas.
+# The covering areas are clipped to the area, and their edges split it into a grid of cells which are each
+# either entirely covered or entirely uncovered, so only one block per cell needs to be checked.
+def is_area_covered(area: RenderArea, covering_areas: Iterable[RenderArea]) -> bool:
+  covering_areas = [covering_area for covering_area in covering_areas if covering_area.overlaps(area)]
+  if not covering_areas:
+    return False
+
+  # Cell edges, as the first block of each cell along each axis
+  xs = sorted({ area.min_x, area.max_x + 1 }
+    | { max(covering_area.min_x, area.min_x) for covering_area in covering_areas }
+    | { min(covering_area.max_x + 1, area.max_x + 1) for covering_area in covering_areas })
+  zs = sorted({ area.min_z, area.max_z + 1 }
+    | { max(covering_area.min_z, area.min_z) for covering_area in covering_areas }
+    | { min(covering_area.max_z + 1, area.max_z + 1) for covering_area in covering_areas })
+
+  for x in xs[:-1]:
+    for z in zs[:-1]:
+      if not any(covering_area.min_x <= x <= covering_area.max_x and covering_area.min_z <= z <= covering_area.max_z for covering_area in covering_areas):
+        return False
+
+  return True
+
+# Covers a rectangle of blocks with a grid of equal squares of at most the maximum radius.
+# The grid has as few columns and rows as possible, and the squares are shrunk to share the rectangle evenly, so that
+# neighbouring squares overlap as little as possible.
+def cover_rectangle(min_x: int, min_z: int, max_x: int, max_z: int, max_radius: int, min_radius: int = 0) -> List[RenderArea]:
+  side = 2 * max_radius + 1
+  width = max_x - min_x + 1
+  height = max_z - min_z + 1
+
+  columns = ceil(width / side)
+  rows = ceil(height / side)
+
+  # Radius of a square just large enough to cover the widest column and the tallest row
+  radius = max(min_radius, ceil((ceil(width / columns) - 1) / 2), ceil((ceil(height / rows) - 1) / 2))
+
+  def get_centres(start: int, length: int, count: int) -> List[int]:
+    return [start + (length * i // count + length * (i + 1) // count - 1) // 2 for i in range(count)]
+
+  return [
+    RenderArea(x, z, radius)
+    for z in get_centres(min_z, height, rows)
+    for x in get_centres(min_x, width, columns)
+  ]
+
+# Orders the squares of a grid in a spiral out from the centre: ring by ring, and around each ring by angle, so that
+# the squares nearest the centre come first.
+def spiral_order(areas: List[RenderArea], x: int, z: int) -> List[RenderArea]:
+  def get_spiral_position(area: RenderArea) -> Tuple[int, float]:
+    # Distance in half squares, rounded to absorb the rounding of the square centres
+    distance = max(abs(area.x - x), abs(area.z - z))
+    ring = round(2 * distance / (2 * area.radius + 1))
+    return ring, atan2(area.z - z, area.x - x)
+
+  return sorted(areas, key = get_spiral_position)
+
+# Covers every block within the half width of a path through the waypoints with squares of at most the maximum radius.
+# Walks the path block by block, and grows the current square until the next block of the path would no longer fit,
+# so that each square covers as long a stretch of the path as it can. Stops early once there are more than max_areas squares.
+def cover_path(waypoints: List[Tuple[int, int]], half_width: int, max_radius: int, min_radius: int = 0, max_areas: int = None) -> List[RenderArea]:
+  # Greatest distance along either axis between the path blocks covered by one square
+  max_extent = 2 * (max_radius - half_width)
+
+  areas = []
+  bounds = None
+
+  def add_area(min_x: int, max_x: int, min_z: int, max_z: int) -> None:
+    x = (min_x + max_x) // 2
+    z = (min_z + max_z) // 2
+    radius = max(min_radius, max(x - min_x, max_x - x, z - min_z, max_z - z) + half_width)
+    areas.append(RenderArea(x, z, radius))
+
+  for x, z in walk_path(waypoints):
+    if bounds is not None:
+      min_x, max_x, min_z, max_z = bounds
+      extended_bounds = (min(min_x, x), max(max_x, x), min(min_z, z), max(max_z, z))
+      if extended_bounds[1] - extended_bounds[0] <= max_extent and extended_bounds[3] - extended_bounds[2] <= max_extent:
+        bounds = extended_bounds
+        continue
+
+      add_area(*bounds)
+      if max_areas is not None and len(areas) > max_areas:
+        return areas
+
+    bounds = (x, x, z, z)
+
+  if bounds is not None:
+    add_area(*bounds)
+
+  return areas
+
+# Yields the blocks along the straight lines between consecutive waypoints
+def walk_path(waypoints: List[Tuple[int, int]]) -> Iterator[Tuple[int, int]]:
+  if not waypoints:
+    return
+
+  yield waypoints[0]
+
+  for (start_x, start_z), (end_x, end_z) in zip(waypoints, waypoints[1:]):
+    steps = max(abs(end_x - start_x), abs(end_z - start_z))
+    for step in range(1, steps + 1):
+      yield start_x + round((end_x - start_x) * step / steps), start_z + round((end_z - start_z) * step / steps)
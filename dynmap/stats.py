@@ -0,0 +1,174 @@
+from collections import Counter, deque
+from contextlib import contextmanager
+from timeit import default_timer as timer
+from typing import Deque, Dict, Iterator, Tuple
+
+import os
+
+# Phases of the render pipeline that are timed
+PHASE_CREDENTIALS = 'credentials'             # REST call for the websocket credentials
+PHASE_WEBSOCKET_CONNECT = 'websocket_connect' # Websocket handshake
+PHASE_WEBSOCKET_AUTH = 'websocket_auth'       # Websocket authentication
+PHASE_HEARTBEAT = 'heartbeat'                 # Round trip of a websocket ping
+PHASE_CONSOLE_DISPATCH = 'console_dispatch'   # From receiving a console line to offering it to the waiters and listeners
+PHASE_PLAYER_LOOKUP = 'player_lookup'         # Finding the player's world and coordinates
+PHASE_QUEUE_WAIT = 'queue_wait'               # Waiting for the renders ahead in the queue
+PHASE_RENDER_START = 'render_start'           # Waiting for Dynmap to acknowledge the radius render command
+PHASE_RENDER = 'render'                       # The radius render itself
+PHASE_DISCORD_EDIT = 'discord_edit'           # Editing a status message
+PHASE_DISCORD_REACTIONS = 'discord_reactions' # Replacing the reaction of a status message
+PHASE_REQUEST = 'request'                     # A whole render request, from the command to the final status
+
+# Events that are counted
+COUNTER_CONSOLE_LINES = 'console_lines'                 # Console lines received
+COUNTER_CONSOLE_LINES_DROPPED = 'console_lines_dropped' # Console lines no waiter or listener could be interested in
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class PhaseTimings:
+  def __init__(self, max_samples: int):
+    self.samples: Deque[float] = deque(maxlen = max_samples)
+    self.count = 0
+    self.total_in_seconds = 0.0
+
+  def add(self, duration_in_seconds: float) -> None:
+    self.samples.append(duration_in_seconds)
+    self.count += 1
+    self.total_in_seconds += duration_in_seconds
+
+  # Nearest-rank quantile of the most recent samples
+  def get_quantile(self, quantile: float) -> float | None:
+    if not self.samples:
+      return None
+
+    samples = sorted(self.samples)
+    return samples[min(int(quantile * len(samples)), len(samples) - 1)]
+
+# Rolling timings of each phase of the render pipeline, render throughput per server and world, counts of failures by phase
+# and exception type, and counts of events.
+# Quantiles are computed over the most recent samples of each phase, while counts and totals cover the whole session.
+class DynmapStats:
+  MAX_SAMPLES = 500
+
+  def __init__(self):
+    self.phases: Dict[str, PhaseTimings] = {}
+    self.throughputs: Dict[Tuple[str, str], PhaseTimings] = {} # Tiles per second of renders, by (Pterodactyl server ID, world)
+    self.failures: Counter[Tuple[str, str]] = Counter()
+    self.counters: Counter[str] = Counter()
+
+  def record(self, phase: str, duration_in_seconds: float) -> None:
+    phase_timings = self.phases.get(phase)
+    if phase_timings is None:
+      phase_timings = self.phases[phase] = PhaseTimings(self.MAX_SAMPLES)
+    phase_timings.add(duration_in_seconds)
+
+  def record_throughput(self, server_id: str, world: str, tiles_per_second: float) -> None:
+    throughput = self.throughputs.get((server_id, world))
+    if throughput is None:
+      throughput = self.throughputs[(server_id, world)] = PhaseTimings(self.MAX_SAMPLES)
+    throughput.add(tiles_per_second)
+
+  def record_failure(self, phase: str, ex: BaseException) -> None:
+    self.failures[(phase, type(ex).__name__)] += 1
+
+  def count(self, counter: str, increment: int = 1) -> None:
+    self.counters[counter] += increment
+
+  # Times the block. Failed blocks are counted as failures instead of being timed.
+  @contextmanager
+  def measure(self, phase: str) -> Iterator[None]:
+    start_time_in_seconds = timer()
+    try:
+      yield
+    except Exception as ex:
+      self.record_failure(phase, ex)
+      raise
+    self.record(phase, timer() - start_time_in_seconds)
+
+  def format_table(self) -> str:
+    output = '{:<20} | {:>8} | {:>9} | {:>9} | {:>9}\n'.format('Phase', 'Count', 'p50', 'p95', 'p99')
+    for phase, phase_timings in self.phases.items():
+      quantiles = [phase_timings.get_quantile(quantile) for quantile in QUANTILES]
+      output += '{:<20} | {:>8} | {:>9} | {:>9} | {:>9}\n'.format(phase, phase_timings.count, *[self.format_duration(quantile) for quantile in quantiles])
+
+    if self.throughputs:
+      output += '\n{:<20} | {:<20} | {:>8} | {:>9} | {:>9} | {:>9}\n'.format('Server', 'World', 'Renders', 'p50 t/s', 'p95 t/s', 'p99 t/s')
+      for (server_id, world), throughput in sorted(self.throughputs.items()):
+        quantiles = [throughput.get_quantile(quantile) for quantile in QUANTILES]
+        output += '{:<20} | {:<20} | {:>8} | {:>9} | {:>9} | {:>9}\n'.format(server_id, world, throughput.count, *[self.format_throughput(quantile) for quantile in quantiles])
+
+    if self.failures:
+      output += '\n{:<20} | {:<30} | {:>8}\n'.format('Phase', 'Failure', 'Count')
+      for (phase, failure), failure_count in sorted(self.failures.items()):
+        output += '{:<20} | {:<30} | {:>8}\n'.format(phase, failure, failure_count)
+
+    if self.counters:
+      output += '\n{:<30} | {:>12}\n'.format('Counter', 'Count')
+      for counter, counter_count in sorted(self.counters.items()):
+        output += '{:<30} | {:>12}\n'.format(counter, counter_count)
+
+    return output
+
+  # Prometheus text exposition format
+  def format_prometheus(self) -> str:
+    lines = [
+      '# HELP dynmap_phase_duration_seconds Duration of the phases of the Dynmap render pipeline.',
+      '# TYPE dynmap_phase_duration_seconds summary'
+    ]
+    for phase, phase_timings in self.phases.items():
+      for quantile in QUANTILES:
+        value = phase_timings.get_quantile(quantile)
+        if value is not None:
+          lines.append(f'dynmap_phase_duration_seconds{{phase="{phase}",quantile="{quantile}"}} {value:.6f}')
+      lines.append(f'dynmap_phase_duration_seconds_sum{{phase="{phase}"}} {phase_timings.total_in_seconds:.6f}')
+      lines.append(f'dynmap_phase_duration_seconds_count{{phase="{phase}"}} {phase_timings.count}')
+
+    lines += [
+      '# HELP dynmap_render_tiles_per_second Tiles rendered per second by Dynmap radius renders, by server and world.',
+      '# TYPE dynmap_render_tiles_per_second summary'
+    ]
+    for (server_id, world), throughput in sorted(self.throughputs.items()):
+      labels = f'server="{server_id}",world="{world}"'
+      for quantile in QUANTILES:
+        value = throughput.get_quantile(quantile)
+        if value is not None:
+          lines.append(f'dynmap_render_tiles_per_second{{{labels},quantile="{quantile}"}} {value:.2f}')
+      lines.append(f'dynmap_render_tiles_per_second_sum{{{labels}}} {throughput.total_in_seconds:.2f}')
+      lines.append(f'dynmap_render_tiles_per_second_count{{{labels}}} {throughput.count}')
+
+    lines += [
+      '# HELP dynmap_phase_failures_total Failures of the phases of the Dynmap render pipeline, by exception type.',
+      '# TYPE dynmap_phase_failures_total counter'
+    ]
+    for (phase, failure), failure_count in sorted(self.failures.items()):
+      lines.append(f'dynmap_phase_failures_total{{phase="{phase}",type="{failure}"}} {failure_count}')
+
+    lines += [
+      '# HELP dynmap_events_total Events counted by the Dynmap cog.',
+      '# TYPE dynmap_events_total counter'
+    ]
+    for counter, counter_count in sorted(self.counters.items()):
+      lines.append(f'dynmap_events_total{{event="{counter}"}} {counter_count}')
+
+    return '\n'.join(lines) + '\n'
+
+  # Replaces the file in one step, so that a scraper never reads a partially written file
+  def write_prometheus(self, path: str) -> None:
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'w') as file:
+      file.write(self.format_prometheus())
+    os.replace(temporary_path, path)
+
+  @staticmethod
+  def format_duration(duration_in_seconds: float | None) -> str:
+    if duration_in_seconds is None:
+      return '-'
+    elif duration_in_seconds < 1:
+      return f'{duration_in_seconds * 1000:.0f}ms'
+    return f'{duration_in_seconds:.1f}s'
+
+  @staticmethod
+  def format_throughput(tiles_per_second: float | None) -> str:
+    if tiles_per_second is None:
+      return '-'
+    return f'{tiles_per_second:.1f}'
\ No newline at end of file
@@ -0,0 +1,111 @@
+from asyncio import Task, create_task, sleep
+from discord import Embed, Message, RateLimited
+from discord.errors import HTTPException
+from timeit import default_timer as timer
+from typing import Dict
+
+from .stats import PHASE_DISCORD_EDIT, PHASE_DISCORD_REACTIONS, DynmapStats
+
+# Sends updates to a render's status message in the background, one request at a time.
+# Updates change the embed in place and only mark the message as pending, so that any number of updates made while a
+# request is in flight are coalesced into a single edit carrying the latest state. Reactions are only cleared and
+# re-added when the reaction actually changes, and rate limits are waited out before sending the latest state again.
+class StatusMessage:
+  MIN_EDIT_INTERVAL_IN_SECONDS = 1
+  DEFAULT_RETRY_AFTER_IN_SECONDS = 5
+
+  def __init__(self, message: Message, embed: Embed, stats: DynmapStats):
+    self.message = message
+    self.embed = embed
+    self.stats = stats
+
+    self.reaction: str = None
+    self.shown_reaction: str = None
+
+    self.pending = False
+    self.send_task: Task = None
+    self.last_sent_time: float = None
+
+    # The error of the last attempt if it was not a rate limit, raised by the next flush.
+    # A later successful attempt clears it, since the message then shows the latest state after all.
+    self.error: HTTPException = None
+
+  def update(self, reaction: str = None) -> None:
+    self.reaction = reaction
+    self.schedule()
+
+  def schedule(self) -> None:
+    self.pending = True
+    if self.send_task is None or self.send_task.done():
+      self.send_task = create_task(self.send())
+
+  async def send(self) -> None:
+    while self.pending:
+      if self.last_sent_time is not None:
+        wait_time_in_seconds = self.last_sent_time + self.MIN_EDIT_INTERVAL_IN_SECONDS - timer()
+        if wait_time_in_seconds > 0:
+          await sleep(wait_time_in_seconds)
+
+      self.pending = False
+      self.last_sent_time = timer()
+
+      try:
+        with self.stats.measure(PHASE_DISCORD_EDIT):
+          await self.message.edit(embed = self.embed)
+
+        if self.reaction != self.shown_reaction:
+          with self.stats.measure(PHASE_DISCORD_REACTIONS):
+            await self.message.clear_reactions()
+            self.shown_reaction = None
+
+            if self.reaction:
+              await self.message.add_reaction(self.reaction)
+              self.shown_reaction = self.reaction
+
+        self.error = None
+
+      except RateLimited as ex:
+        self.pending = True
+        await sleep(ex.retry_after)
+
+      except HTTPException as ex:
+        if ex.status != 429:
+          self.error = ex
+          continue
+
+        self.pending = True
+        await sleep(self.get_retry_after(ex))
+
+  # Waits until the latest state has been sent
+  async def flush(self) -> None:
+    if self.send_task is not None:
+      await self.send_task
+
+    if self.error is not None:
+      error = self.error
+      self.error = None
+      raise error
+
+  def get_retry_after(self, ex: HTTPException) -> float:
+    headers = getattr(ex.response, 'headers', None) or {}
+
+    try:
+      return float(headers.get('Retry-After', self.DEFAULT_RETRY_AFTER_IN_SECONDS))
+    except ValueError:
+      return self.DEFAULT_RETRY_AFTER_IN_SECONDS
+
+# Status messages of the renders that are currently being shown, by message ID
+class StatusMessages:
+  def __init__(self, stats: DynmapStats):
+    self.stats = stats
+    self.status_messages: Dict[int, StatusMessage] = {}
+
+  def get(self, message: Message, embed: Embed) -> StatusMessage:
+    status_message = self.status_messages.get(message.id)
+    if status_message is None:
+      status_message = self.status_messages[message.id] = StatusMessage(message, embed, self.stats)
+    return status_message
+
+  # Stops tracking a message. Updates that were already scheduled are still sent.
+  def discard(self, message_id: int) -> None:
+    self.status_messages.pop(message_id, None)
\ No newline at end of file